@@ -13,10 +13,10 @@ import pkg_resources
 # Get project root (one level up from build_config)
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-def check_dependencies():
+def check_dependencies(builder='pyinstaller'):
     """Check and install required dependencies"""
     required = {
-        'pyinstaller',
+        builder,
         'PyQt5',
         'pywin32',
         'Pillow'  # For image handling
@@ -106,5 +106,54 @@ def build_executable():
         print(f"Unexpected error: {e}")
         sys.exit(1)
 
+def build_executable_nuitka():
+    """Build executable with Nuitka (compiles Python to C, no onefile extraction at launch)"""
+    print("Building SD Backup Tool with Nuitka...")
+    
+    # Check and install dependencies
+    check_dependencies('nuitka')
+    
+    dist_dir = os.path.join(PROJECT_ROOT, 'dist')
+    
+    # Build command
+    build_cmd = [
+        sys.executable,
+        '-m',
+        'nuitka',
+        '--standalone',
+        '--follow-imports',
+        '--enable-plugin=pyqt5',
+        '--assume-yes-for-downloads',
+        '--windows-disable-console',
+        '--windows-icon-from-ico=' + os.path.join(PROJECT_ROOT, "assets", "icon.ico"),
+        '--include-data-dir=' + os.path.join(PROJECT_ROOT, "assets") + "=assets",
+        '--include-package=sd_backup_tool',
+        '--include-package=win32com',
+        '--output-dir=' + dist_dir,
+        '--output-filename=SD_Backup_Tool.exe',
+        os.path.join(PROJECT_ROOT, 'main.py')
+    ]
+    
+    try:
+        # Prepare environment
+        env = os.environ.copy()
+        env["PYTHONPATH"] = os.path.join(PROJECT_ROOT, "src") + os.pathsep + env.get("PYTHONPATH", "")
+        
+        # Run build command from project root
+        print(f"Executing Nuitka build command in {PROJECT_ROOT}...")
+        subprocess.run(build_cmd, check=True, cwd=PROJECT_ROOT, env=env)
+        print("SD Backup Tool built successfully!")
+        print(f"Executable location: {os.path.join(dist_dir, 'main.dist', 'SD_Backup_Tool.exe')}")
+        
+    except subprocess.CalledProcessError as e:
+        print(f"Error building executable: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+        sys.exit(1)
+
 if __name__ == '__main__':
-    build_executable() 
\ No newline at end of file
+    if '--nuitka' in sys.argv[1:]:
+        build_executable_nuitka()
+    else:
+        build_executable() 
\ No newline at end of file
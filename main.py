@@ -7,56 +7,60 @@ if not getattr(sys, 'frozen', False):
     if src_path not in sys.path:
         sys.path.insert(0, src_path)
 
-try:
-    from sd_backup_tool.__main__ import main
-except Exception as e:
-    import traceback
-    print("\n" + "!"*60)
-    print(f" CRITICAL ERROR: Application failed to start.")
-    print(f" Error Type: {type(e).__name__}")
-    print(f" Error Message: {e}")
-    print("!"*60 + "\n")
-    
-    traceback.print_exc()
-    
-    # Show search paths and bundle contents for debugging
+def print_import_diagnostics():
+    """Show search paths and bundle contents for debugging a failed import"""
     print(f"\nPython Search Paths:")
     for p in sys.path:
         print(f"  - {p}")
-        
+
     if getattr(sys, 'frozen', False):
         bundle_dir = getattr(sys, '_MEIPASS', 'unknown')
         print(f"\nBundle Directory (_MEIPASS): {bundle_dir}")
         if os.path.exists(bundle_dir):
             try:
-                print(f"\nFiles in Bundle Root (first 50):")
-                files = os.listdir(bundle_dir)
-                for f in sorted(files)[:50]:
-                    print(f"  [ {'DIR ' if os.path.isdir(os.path.join(bundle_dir, f)) else 'FILE'} ] {f}")
-                
                 pkg_path = os.path.join(bundle_dir, 'sd_backup_tool')
-                if os.path.exists(pkg_path):
-                    print(f"\nPackage 'sd_backup_tool' contents (first 20):")
-                    for f in sorted(os.listdir(pkg_path))[:20]:
-                        print(f"  {f}")
-                else:
+                if not os.path.exists(pkg_path):
                     print("\nWARNING: 'sd_backup_tool' package directory NOT FOUND in bundle root!")
+
+                # Listing the bundle is only useful when debugging a broken build
+                if os.environ.get('SD_BACKUP_DEBUG'):
+                    # nsmallest keeps only N names while streaming, and gives the first N in sorted order
+                    import heapq
+                    print(f"\nFiles in Bundle Root (first 50):")
+                    with os.scandir(bundle_dir) as it:
+                        for entry in heapq.nsmallest(50, it, key=lambda e: e.name):
+                            print(f"  [ {'DIR ' if entry.is_dir() else 'FILE'} ] {entry.name}")
+
+                    if os.path.exists(pkg_path):
+                        print(f"\nPackage 'sd_backup_tool' contents (first 20):")
+                        with os.scandir(pkg_path) as it:
+                            for name in heapq.nsmallest(20, (e.name for e in it)):
+                                print(f"  {name}")
+                else:
+                    print("\nSet SD_BACKUP_DEBUG=1 to list the bundle contents.")
             except Exception as le:
                 print(f"Diagnostic failed: {le}")
-    
-    print("\nPlease take a photo or screenshot of this window.")
-    print("This window will close in 60 seconds...")
-    import time
-    time.sleep(60)
-    sys.exit(1)
 
 if __name__ == "__main__":
     try:
+        from sd_backup_tool.__main__ import main
         sys.exit(main())
     except Exception as e:
         import traceback
+        print("\n" + "!"*60)
+        print(f" CRITICAL ERROR: Application failed to start.")
+        print(f" Error Type: {type(e).__name__}")
+        print(f" Error Message: {e}")
+        print("!"*60 + "\n")
+
         traceback.print_exc()
-        print(f"\nRuntime Error: {e}")
+
+        # Only a failed import needs the search path / bundle listing
+        if isinstance(e, ImportError):
+            print_import_diagnostics()
+
+        print("\nPlease take a photo or screenshot of this window.")
+        print("This window will close in 60 seconds...")
         import time
         time.sleep(60)
         sys.exit(1)
@@ -8,7 +8,7 @@ Main program entry point
 import sys
 import os
 from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import Qt, QTranslator, QLocale
+from PyQt5.QtCore import Qt, QTranslator, QLocale, QTimer
 from PyQt5.QtGui import QFont
 from .ui.main_window_enhanced import MainWindow
 from .locales import LanguageManager
@@ -38,6 +38,11 @@ def excepthook_handler(exc_type, exc_value, exc_tb):
 
 def main():
     """Main entry point"""
+    # Set High DPI support - must happen before QApplication is constructed
+    os.environ.setdefault('QT_ENABLE_HIGHDPI_SCALING', '1')
+    os.environ.setdefault('QT_AUTO_SCREEN_SCALE_FACTOR', '1')
+    QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)  # No env var equivalent
+
     app = QApplication(sys.argv)
     
     # Get language from command line argument or environment variable
@@ -47,24 +52,24 @@ def main():
     elif 'SD_BACKUP_LANG' in os.environ:
         language = os.environ['SD_BACKUP_LANG']
     
-    # Set application attributes
-    app.setApplicationName("Photo Video Backup Tool") # Photo Video Backup Tool
-    app.setApplicationVersion("1.0.0")
-    app.setOrganizationName("SD Backup Tool") # SD Backup Tool
-    
     # Set font - Large font suitable for elderly users
     font = QFont("Microsoft JhengHei", 12)  # Microsoft JhengHei (Traditional Chinese font)
     app.setFont(font)
-    
-    # Set High DPI support
-    app.setAttribute(Qt.AA_EnableHighDpiScaling, True)
-    app.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
-    
+
     # Create main window with specified language
     window = MainWindow()
     window.lang.set_language(language)
     window.show()
     
+    # Set application attributes once the first paint is queued - MainWindow
+    # passes explicit names to QSettings and sets its own title, so nothing
+    # before this point depends on them
+    def set_application_attributes():
+        app.setApplicationName("Photo Video Backup Tool") # Photo Video Backup Tool
+        app.setApplicationVersion("1.0.0")
+        app.setOrganizationName("SD Backup Tool") # SD Backup Tool
+    QTimer.singleShot(0, set_application_attributes)
+    
     sys.excepthook = excepthook_handler # Set the custom excepthook
     return app.exec_()
 
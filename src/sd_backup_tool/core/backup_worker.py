@@ -8,16 +8,199 @@ import os
 import sys
 import time
 import shutil
+import struct
+import tempfile
+import queue
 import hashlib
+import mmap
+import ctypes
+import functools
+import weakref
+from ctypes import wintypes
+import pythoncom
+import pywintypes
+import win32api
 import win32com.client
+import win32con
+import win32event
 import win32file
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from PyQt5.QtCore import QThread, pyqtSignal
-from threading import Lock
+from threading import Event, Lock, Thread
+from .logging_setup import configure_logger
 
 # Remove wpd import and related code
 print("Using Windows COM for MTP operations.")
 
+# Access right needed to watch a directory with ReadDirectoryChangesW
+FILE_LIST_DIRECTORY = 0x0001
+DIRECTORY_WATCH_FILTER = (win32con.FILE_NOTIFY_CHANGE_FILE_NAME |
+                          win32con.FILE_NOTIFY_CHANGE_SIZE |
+                          win32con.FILE_NOTIFY_CHANGE_LAST_WRITE)
+
+# CopyFileExW lets the kernel pipeline regular file copies and keeps timestamps/attributes
+COPY_FILE_ALLOW_DECRYPTED_DESTINATION = 0x00000008
+COPY_FILE_NO_BUFFERING = 0x00001000
+NO_BUFFERING_MIN_SIZE = 64 * 1024 * 1024  # Unbuffered I/O only pays off for large files
+try:
+    _kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+    _CopyFileExW = _kernel32.CopyFileExW
+    _CopyFileExW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, ctypes.c_void_p,
+                             ctypes.c_void_p, ctypes.POINTER(wintypes.BOOL), wintypes.DWORD]
+    _CopyFileExW.restype = wintypes.BOOL
+except (AttributeError, OSError):
+    _CopyFileExW = None
+
+# Block cloning (ReFS, Dev Drive): same-volume copies only map the source extents
+FSCTL_DUPLICATE_EXTENTS_TO_FILE = 0x00098344
+FSCTL_SET_SPARSE = 0x000900C4
+FILE_SUPPORTS_BLOCK_REFCOUNTING = 0x08000000
+CLONE_CHUNK_SIZE = 1024 * 1024 * 1024  # A single request must stay under 4 GB
+
+# Digest used to verify copies - computed while the source is being copied.
+# SHA-1 rather than MD5 because OpenSSL runs it on the CPU's SHA extensions where available.
+HASH_ALGORITHM = 'sha1'
+
+# Fallback copies of files this large overlap reading and writing on two threads
+PIPELINE_MIN_SIZE = 32 * 1024 * 1024
+# Fallback copies of files up to this size are written straight from a read-only mapping
+MMAP_MAX_SIZE = 1024 * 1024
+
+@functools.lru_cache(maxsize=256)
+def _volume_path(directory):
+    """Mount point of the volume holding directory, or None"""
+    try:
+        return os.path.normcase(win32file.GetVolumePathName(directory))
+    except pywintypes.error:
+        return None
+
+@functools.lru_cache(maxsize=64)
+def _clone_cluster_size(volume):
+    """Cluster size of a volume that supports block cloning, 0 if it doesn't"""
+    try:
+        if not win32api.GetVolumeInformation(volume)[3] & FILE_SUPPORTS_BLOCK_REFCOUNTING:
+            return 0
+        sectors_per_cluster, bytes_per_sector = win32file.GetDiskFreeSpace(volume)[:2]
+        return sectors_per_cluster * bytes_per_sector
+    except pywintypes.error:
+        return 0
+
+def _clone_file(src_path, dst_path, file_size, cluster_size):
+    """Copy a file by sharing its extents with FSCTL_DUPLICATE_EXTENTS_TO_FILE,
+    raises pywintypes.error if the file system refuses"""
+    h_src = win32file.CreateFile(src_path, win32con.GENERIC_READ, win32con.FILE_SHARE_READ,
+                                 None, win32con.OPEN_EXISTING, 0, None)
+    try:
+        h_dst = win32file.CreateFile(dst_path, win32con.GENERIC_READ | win32con.GENERIC_WRITE, 0,
+                                     None, win32con.CREATE_ALWAYS, 0, None)
+        try:
+            # The target must be sparse if the source is, and already have its final size
+            if win32file.GetFileAttributes(src_path) & win32con.FILE_ATTRIBUTE_SPARSE_FILE:
+                win32file.DeviceIoControl(h_dst, FSCTL_SET_SPARSE, None, 0)
+            win32file.SetFilePointer(h_dst, file_size, win32con.FILE_BEGIN)
+            win32file.SetEndOfFile(h_dst)
+            # Ranges are cluster aligned, the last one may run past the end of file
+            total = -(-file_size // cluster_size) * cluster_size
+            offset = 0
+            while offset < total:
+                count = min(CLONE_CHUNK_SIZE, total - offset)
+                request = struct.pack('Pqqq', int(h_src), offset, offset, count)
+                win32file.DeviceIoControl(h_dst, FSCTL_DUPLICATE_EXTENTS_TO_FILE, request, 0)
+                offset += count
+        finally:
+            h_dst.Close()
+    finally:
+        h_src.Close()
+
+def _copy_buffer_size(file_size):
+    """Pick a copy buffer size: one read for small files, long sequential reads for large ones"""
+    if file_size < 256 * 1024:
+        return 64 * 1024
+    if file_size < 32 * 1024 * 1024:
+        return 1024 * 1024
+    return 8 * 1024 * 1024
+
+def _copy_readinto(src_path, dst_path, bufsize=1 << 20, hasher=None):
+    """Copy file contents through one reused buffer instead of a new bytes object per chunk.
+    If a hasher is given it is fed the same chunks, so hashing needs no second read.
+    Returns the number of bytes written."""
+    buf = bytearray(bufsize)
+    mv = memoryview(buf)
+    # The destination stays buffered: a raw write may be partial, BufferedWriter retries it
+    # and passes chunks this large straight through without copying them
+    bytes_written = 0
+    with open(src_path, 'rb', buffering=0) as fsrc, open(dst_path, 'wb') as fdst:
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            fdst.write(mv[:n])
+            if hasher is not None:
+                hasher.update(mv[:n])
+            bytes_written += n
+    return bytes_written
+
+def _copy_mmap(src_path, dst_path, hasher=None):
+    """Copy a small, non-empty file by writing its read-only mapping in one call.
+    Returns the number of bytes written."""
+    with open(src_path, 'rb') as fsrc, open(dst_path, 'wb') as fdst:
+        with mmap.mmap(fsrc.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasher is not None:
+                hasher.update(mm)
+            return fdst.write(mm)
+
+def _pipelined_copy(src_path, dst_path, bufsize=4 << 20, depth=4, hasher=None):
+    """Copy with a reader thread filling buffers while the calling thread writes them,
+    so the source and destination devices are busy at the same time.
+    Returns the number of bytes written."""
+    free_q = queue.Queue()
+    data_q = queue.Queue()
+    for _ in range(depth):
+        free_q.put(bytearray(bufsize))
+    abort = Event()
+    
+    def reader(fsrc):
+        try:
+            while True:
+                buf = free_q.get()
+                if abort.is_set():
+                    break
+                n = fsrc.readinto(buf)
+                if not n:
+                    break
+                data_q.put((buf, n))
+            data_q.put(None)
+        except Exception as e:
+            data_q.put(e)
+    
+    bytes_written = 0
+    with open(src_path, 'rb', buffering=0) as fsrc, open(dst_path, 'wb') as fdst:
+        reader_thread = Thread(target=reader, args=(fsrc,), name='BackupCopyReader', daemon=True)
+        reader_thread.start()
+        try:
+            while True:
+                item = data_q.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                buf, n = item
+                mv = memoryview(buf)[:n]
+                fdst.write(mv)
+                if hasher is not None:
+                    hasher.update(mv)
+                bytes_written += n
+                free_q.put(buf)
+        finally:
+            # Wake the reader if it is waiting for a free buffer, and let it finish
+            # before the source file is closed
+            abort.set()
+            free_q.put(None)
+            reader_thread.join()
+    return bytes_written
+
 class BackupWorker(QThread):
     progress_updated = pyqtSignal(int, int, int, int)
     file_copying = pyqtSignal(str)
@@ -26,379 +209,512 @@ class BackupWorker(QThread):
     backup_error = pyqtSignal(str)
     drive_disconnected = pyqtSignal(str, int, int)
     
-    def __init__(self, files_list, destination_base):
+    def __init__(self, files_list, destination_base, compute_hashes=False):
         super().__init__()
         self.files_list = files_list
         self.destination_base = destination_base
+        # Normalize every path once up front, the copy helpers use the cached
+        # '_dest', '_dest_dir' and '_src' fields instead of the raw strings
+        for fi in files_list:
+            if fi.get('destination'):
+                fi['_dest'] = PathHandler.normalize_path(fi['destination'])
+                fi['_dest_dir'] = os.path.dirname(fi['_dest'])
+            if fi.get('source'):
+                fi['_src'] = PathHandler.normalize_path(fi['source'])
+        # Hash regular files during the copy and store the digest as file_info['src_hash']
+        self.compute_hashes = compute_hashes
         self.should_stop = False
+        # Shell.Application and its folder namespaces are shared by all copies
+        self._shell = None
+        self._ns_cache = {}
+        self._shell_lock = Lock()
+        # Set by stop() to abort CopyFileExW calls that are in progress
+        self._cancel_copy = wintypes.BOOL(0)
         self.setup_logging()
         
     def setup_logging(self):
         """Setup logging for the worker"""
-        import logging
-        self.logger = logging.getLogger('BackupWorker')
-        self.logger.setLevel(logging.INFO)
-        
-        # Create console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        
-        # Create formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        ch.setFormatter(formatter)
-        
-        # Add handler to logger
-        self.logger.addHandler(ch)
+        # Per-file copy messages are debug/info level; set SDBACKUP_LOGLEVEL=DEBUG to see them
+        self.logger = configure_logger('BackupWorker')
         
     def run(self):
         """Main backup process"""
+        # Multithreaded apartment, so the cached Shell objects can be used by the MTP pool workers
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
         try:
+            # Start the Shell COM server once for the whole run, before any MTP copy needs it
+            if any(f.get('is_mtp', False) for f in self.files_list):
+                with self._shell_lock:
+                    self._shell = self._create_shell()
+            
             total_files = len(self.files_list)
             files_processed = 0
             files_copied = 0
             files_skipped = 0
             
-            # Create destination folders
-            self._create_destination_folders(self.files_list)
+            # Create destination folders and read what each of them already holds,
+            # so the per-file "already exists" check is a set lookup
+            destination_dirs = self._create_destination_folders(self.files_list)
+            existing_files = self._list_existing_files(destination_dirs)
+            unlisted_dirs = set()
             
-            for file_info in self.files_list:
-                if self.should_stop:
-                    break
+            # Regular files are disk-to-disk and I/O bound, so several copies can overlap.
+            # MTP transfers go through the Shell COM server which is not free-threaded,
+            # so they get a small pool of their own and join the COM apartment per copy.
+            regular_workers = min(8, (os.cpu_count() or 1) * 2)
+            regular_pool = ThreadPoolExecutor(max_workers=regular_workers, thread_name_prefix='BackupCopy')
+            mtp_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='BackupMTP')
+            futures = []
+            
+            try:
+                for file_info in self.files_list:
+                    if self.should_stop:
+                        break
                     
-                files_processed += 1
-                self.progress_updated.emit(files_processed, total_files, files_copied, files_skipped)
-                
-                try:
-                    destination_path = file_info.get('destination')
+                    destination_path = file_info.get('_dest')
                     if not destination_path:
-                        print(f"No destination path for file: {file_info.get('name', 'unknown')}")
+                        self.logger.warning("No destination path for file: %s", file_info.get('name', 'unknown'))
+                        files_processed += 1
                         files_skipped += 1
+                        self.progress_updated.emit(files_processed, total_files, files_copied, files_skipped)
                         continue
                     
-                    # Ensure destination directory exists
-                    dest_dir = os.path.dirname(destination_path)
-                    if not os.path.exists(dest_dir):
-                        os.makedirs(dest_dir, exist_ok=True)
-                        print(f"Created directory: {dest_dir}")
-                    
-                    # Check if file already exists
-                    if os.path.exists(destination_path):
-                        print(f"Skipping existing file: {file_info['name']}")
+                    # Check if file already exists (or is already queued under the same name)
+                    dest_dir = file_info['_dest_dir']
+                    dest_names = existing_files.get(dest_dir)
+                    if dest_names is None:
+                        # The folder could not be listed up front, so its files are checked on disk
+                        unlisted_dirs.add(dest_dir)
+                        dest_names = existing_files[dest_dir] = set()
+                    dest_name = os.path.normcase(os.path.basename(destination_path))
+                    if dest_name in dest_names or (dest_dir in unlisted_dirs
+                                                   and os.path.exists(destination_path)):
+                        self.logger.info("Skipping existing file: %s", file_info['name'])
                         self.file_skipping.emit(file_info['name'])
+                        files_processed += 1
                         files_skipped += 1
+                        self.progress_updated.emit(files_processed, total_files, files_copied, files_skipped)
                         continue
+                    dest_names.add(dest_name)
                     
-                    # Copy the file
-                    print(f"Copying file: {file_info['name']}")
-                    self.file_copying.emit(file_info['name'])
+                    if file_info.get('is_mtp', False):
+                        futures.append(mtp_pool.submit(self._backup_mtp_file, file_info))
+                    else:
+                        futures.append(regular_pool.submit(self._backup_file, file_info))
+                
+                # Counters are only touched here, on the worker's own thread
+                for future in as_completed(futures):
+                    if self.should_stop:
+                        for pending in futures:
+                            pending.cancel()
+                        break
                     
-                    if self.copy_file_item(file_info):
+                    files_processed += 1
+                    if future.result():
                         files_copied += 1
-                        print(f"Successfully copied: {file_info['name']} to {destination_path}")
                     else:
                         files_skipped += 1
-                        print(f"Failed to copy: {file_info['name']}")
-                        
-                except Exception as e:
-                    print(f"Error processing file {file_info.get('name', 'unknown')}: {e}")
-                    import traceback
-                    print(f"Traceback: {traceback.format_exc()}")
-                    files_skipped += 1
+                    self.progress_updated.emit(files_processed, total_files, files_copied, files_skipped)
+            finally:
+                regular_pool.shutdown(wait=True)
+                mtp_pool.shutdown(wait=True)
                     
             # Emit final results
             if not self.should_stop:
                 self.backup_completed.emit(files_processed, files_copied, self.destination_base)
                 
         except Exception as e:
-            print(f"Error in backup process: {e}")
+            self.logger.error("Error in backup process: %s", e)
             self.backup_error.emit(str(e))
+        finally:
+            self._shell = None
+            self._ns_cache.clear()
+            pythoncom.CoUninitialize()
+    
+    def _create_shell(self):
+        """Create Shell.Application, early-bound when the type library wrapper can be generated"""
+        try:
+            return win32com.client.gencache.EnsureDispatch("Shell.Application")
+        except Exception as e:
+            # gen_py cache not writable (e.g. some frozen builds) - late binding works the same
+            self.logger.debug("Early-bound Shell.Application unavailable, using Dispatch: %s", e)
+            return win32com.client.Dispatch("Shell.Application")
+    
+    def _shell_namespace(self, path):
+        """Get a Shell folder for path, creating Shell.Application and the folder only once"""
+        with self._shell_lock:
+            if self._shell is None:
+                self._shell = self._create_shell()
+            namespace = self._ns_cache.get(path)
+            if namespace is None:
+                namespace = self._shell.NameSpace(path)
+                if namespace:
+                    self._ns_cache[path] = namespace
+            return namespace
+    
+    def _backup_mtp_file(self, file_info):
+        """_backup_file for the MTP pool, with COM initialized for the duration of the copy"""
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+        try:
+            return self._backup_file(file_info)
+        finally:
+            pythoncom.CoUninitialize()
+    
+    def _backup_file(self, file_info):
+        """Copy a single file on a pool thread, returns True if it was copied"""
+        try:
+            # Copy the file
+            self.logger.info("Copying file: %s", file_info['name'])
+            self.file_copying.emit(file_info['name'])
+            
+            if self.copy_file_item(file_info):
+                self.logger.debug("Successfully copied: %s to %s", file_info['name'], file_info['destination'])
+                return True
+            self.logger.warning("Failed to copy: %s", file_info['name'])
+            return False
+            
+        except Exception as e:
+            self.logger.error("Error processing file %s: %s", file_info.get('name', 'unknown'), e)
+            self.logger.debug("Traceback", exc_info=True)
+            return False
             
     def copy_file_item(self, file_info):
         """Copy a file item, handling both regular files and MTP files"""
         try:
-            print(f"[copy_file_item] Starting copy for: {file_info['name']}")
+            self.logger.debug("Starting copy for: %s", file_info['name'])
             
             # For MTP files, use the COM interface
             if file_info.get('is_mtp', False):
-                print(f"[copy_file_item] Using MTP copy for: {file_info['name']}")
-                return self.copy_com_mtp_file(file_info, file_info['destination'])
+                self.logger.debug("Using MTP copy for: %s", file_info['name'])
+                return self.copy_com_mtp_file(file_info, file_info['_dest'])
             
             # For regular files, use direct file system copy
-            print(f"[copy_file_item] Using direct file copy for: {file_info['name']}")
+            self.logger.debug("Using direct file copy for: %s", file_info['name'])
+            source = file_info['_src']
+            destination = file_info['_dest']
             try:
-                # Ensure destination directory exists
-                dest_dir = os.path.dirname(file_info['destination'])
-                os.makedirs(dest_dir, exist_ok=True)
+                # Same volume with block cloning support: no data has to be moved at all
+                if not self.compute_hashes and self._clone_file_if_supported(file_info):
+                    self.logger.debug("Cloned: %s", file_info['name'])
+                    return True
                 
-                # Copy the file using optimized direct copy with large buffer
-                # shutil.copy2 is good but we can ensure optimal buffer size manually if needed.
-                # standard copy2 + copyfileobj uses default buffer (usually 16KB-64KB).
-                # We'll stick to shutil.copy2 for metadata preservation but ensure we use it efficiently.
-                # If performance is critical, we could use a custom copy loop, but shutil.copy2 is generally robust.
-                # However, for this task, let's explicitly use a larger buffer copy implementation
-                # while preserving metadata.
+                # CopyFileExW never hands the data to Python, so it can't hash in flight
+                if _CopyFileExW is not None and not self.compute_hashes:
+                    self._copy_file_native(source, destination, file_info.get('size', 0))
+                    self.logger.debug("Successfully copied: %s", file_info['name'])
+                    return True
                 
-                with open(file_info['source'], 'rb') as fsrc:
-                    with open(file_info['destination'], 'wb') as fdst:
-                        # 1MB buffer size
-                        shutil.copyfileobj(fsrc, fdst, length=1024*1024)
+                # Fallback when CopyFileExW is unavailable (or hashes are wanted): copy with a
+                # large reused buffer and preserve metadata separately.
+                src_size = os.stat(source).st_size
+                hasher = hashlib.new(HASH_ALGORITHM) if self.compute_hashes else None
+                if src_size >= PIPELINE_MIN_SIZE:
+                    bytes_written = _pipelined_copy(source, destination, hasher=hasher)
+                elif 0 < src_size <= MMAP_MAX_SIZE:
+                    # Empty files can't be mapped, they take the readinto path
+                    bytes_written = _copy_mmap(source, destination, hasher)
+                else:
+                    bytes_written = _copy_readinto(source, destination, _copy_buffer_size(src_size), hasher)
+                if hasher is not None:
+                    file_info['src_hash'] = hasher.hexdigest()
                 
                 # Copy metadata
-                shutil.copystat(file_info['source'], file_info['destination'])
+                shutil.copystat(source, destination)
                 
-                # Verify the copy
-                if os.path.exists(file_info['destination']):
-                    if os.path.getsize(file_info['destination']) == os.path.getsize(file_info['source']):
-                        print(f"[copy_file_item] Successfully copied: {file_info['name']}")
-                        return True
-                    else:
-                        print(f"[copy_file_item] File size mismatch for: {file_info['name']}")
-                        return False
+                # Verify the copy - the write loop already counted the bytes, and open()
+                # succeeding means the destination exists, so no extra stat is needed
+                if bytes_written == src_size:
+                    self.logger.debug("Successfully copied: %s", file_info['name'])
+                    return True
                 else:
-                    print(f"[copy_file_item] Destination file not found: {file_info['destination']}")
+                    self.logger.warning("File size mismatch for: %s", file_info['name'])
                     return False
                     
             except Exception as e:
-                print(f"[copy_file_item] Error copying file: {e}")
-                import traceback
-                print(f"[copy_file_item] Traceback: {traceback.format_exc()}")
+                self.logger.error("Error copying file: %s", e)
+                self.logger.debug("Traceback", exc_info=True)
                 return False
                 
         except Exception as e:
-            print(f"[copy_file_item] Error in copy_file_item: {e}")
-            import traceback
-            print(f"[copy_file_item] Traceback: {traceback.format_exc()}")
+            self.logger.error("Error in copy_file_item: %s", e)
+            self.logger.debug("Traceback", exc_info=True)
+            return False
+            
+    def _copy_file_native(self, source, destination, file_size):
+        """Copy a regular file with CopyFileExW, raises OSError on failure or cancellation"""
+        flags = COPY_FILE_ALLOW_DECRYPTED_DESTINATION
+        if file_size >= NO_BUFFERING_MIN_SIZE:
+            flags |= COPY_FILE_NO_BUFFERING
+        # No progress routine - calling back into Python for every chunk would hold the GIL
+        if not _CopyFileExW(source, destination, None, None, ctypes.byref(self._cancel_copy), flags):
+            raise ctypes.WinError(ctypes.get_last_error())
+            
+    def _clone_file_if_supported(self, file_info):
+        """Block-clone a regular file when source and destination share a volume that
+        supports it, returns False so the caller copies normally otherwise"""
+        src_volume = _volume_path(os.path.dirname(file_info['_src']))
+        if src_volume is None or src_volume != _volume_path(file_info['_dest_dir']):
+            return False
+        cluster_size = _clone_cluster_size(src_volume)
+        if not cluster_size:
+            return False
+        try:
+            _clone_file(file_info['_src'], file_info['_dest'], os.stat(file_info['_src']).st_size, cluster_size)
+            shutil.copystat(file_info['_src'], file_info['_dest'])
+            return True
+        except (pywintypes.error, OSError) as e:
+            # The regular copy opens the destination for writing and replaces this attempt
+            self.logger.debug("Block clone failed for %s, copying instead: %s", file_info['name'], e)
             return False
             
     def copy_com_mtp_file(self, file_info, destination_file_path):
         """Copy a file from an MTP device using COM interface"""
         try:
-            print(f"[copy_com_mtp_file] Attempting to copy: {file_info['name']} to {destination_file_path}")
+            self.logger.debug("Attempting to copy: %s to %s", file_info['name'], destination_file_path)
             
             # Get the COM item from the file info
             com_item = file_info.get('com_item')
             if not com_item:
-                print(f"[copy_com_mtp_file] No COM item found in file_info for: {file_info['name']}")
+                self.logger.warning("No COM item found in file_info for: %s", file_info['name'])
                 return False
             
-            print(f"[copy_com_mtp_file] Using stored COM item for: {file_info['name']}")
+            self.logger.debug("Using stored COM item for: %s", file_info['name'])
             
             # Try the most reliable copy method first (based on previous success)
             methods = [
                 self._copy_com_direct_to_destination,  # This one worked, try first
-                self._copy_com_simple,
-                self._copy_com_via_drag_drop
+                self._copy_com_simple
             ]
             
             for i, method in enumerate(methods):
                 try:
-                    print(f"[copy_com_mtp_file] Trying copy method {i+1}/3: {method.__name__}")
+                    self.logger.debug("Trying copy method %s/%s: %s", i+1, len(methods), method.__name__)
                     result = method(com_item, destination_file_path, file_info)
-                    print(f"[copy_com_mtp_file] Result of {method.__name__}: {result}")
+                    self.logger.debug("Result of %s: %s", method.__name__, result)
                     if result:
-                        print(f"[copy_com_mtp_file] Successfully copied using {method.__name__}")
+                        self.logger.debug("Successfully copied using %s", method.__name__)
                         return True
                     else:
-                        print(f"[copy_com_mtp_file] Method {method.__name__} returned False, trying next method")
+                        self.logger.debug("Method %s returned False, trying next method", method.__name__)
                 except Exception as e:
-                    print(f"[copy_com_mtp_file] Method {method.__name__} failed with exception: {e}")
+                    self.logger.warning("Method %s failed with exception: %s", method.__name__, e)
                     continue
             
-            print("[copy_com_mtp_file] All copy methods failed")
+            self.logger.warning("All copy methods failed")
             return False
             
         except Exception as e:
-            print(f"[copy_com_mtp_file] Error in copy_com_mtp_file: {e}")
-            import traceback
-            print(f"[copy_com_mtp_file] Traceback: {traceback.format_exc()}")
+            self.logger.error("Error in copy_com_mtp_file: %s", e)
+            self.logger.debug("Traceback", exc_info=True)
             return False
             
     def _copy_com_simple(self, com_item, destination_file_path, file_info):
         """Copy a file using direct data transfer from COM object"""
         try:
-            print(f"[_copy_com_simple] Starting direct copy for {file_info['name']}")
+            self.logger.debug("Starting direct copy for %s", file_info['name'])
             
-            # Ensure destination directory exists
-            dest_dir = os.path.dirname(destination_file_path)
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir)
-                print(f"[_copy_com_simple] Created destination directory: {dest_dir}")
+            # Destination directory is created up front by _create_destination_folders
+            dest_dir = file_info['_dest_dir']
             
             # Get the file data using COM
             try:
-                print(f"[_copy_com_simple] Getting file data from COM object")
+                self.logger.debug("Getting file data from COM object")
                 # Try to get the file data using different COM properties
                 file_data = None
                 
-                # Method 1: Try to get data using GetDetailsOf
-                try:
-                    shell = win32com.client.Dispatch("Shell.Application")
-                    folder = shell.NameSpace(os.path.dirname(com_item.Path))
-                    if folder:
-                        for i in range(512):  # Try different property indices
-                            try:
-                                prop = folder.GetDetailsOf(com_item, i)
-                                if prop and len(prop) > 0:
-                                    print(f"[_copy_com_simple] Found property at index {i}: {prop[:100]}")
-                            except:
-                                continue
-                except Exception as e:
-                    print(f"[_copy_com_simple] Error getting details: {e}")
-                
-                # Method 2: Try to get data using Stream
+                # Method 1: Try to get data using Stream
                 try:
                     if hasattr(com_item, 'GetStream'):
                         stream = com_item.GetStream()
                         if stream:
                             file_data = stream.Read()
-                            print(f"[_copy_com_simple] Got file data using GetStream, size: {len(file_data) if file_data else 0}")
+                            self.logger.debug("Got file data using GetStream, size: %s", len(file_data) if file_data else 0)
                 except Exception as e:
-                    print(f"[_copy_com_simple] Error getting stream: {e}")
+                    self.logger.error("Error getting stream: %s", e)
                 
-                # Method 3: Try to get data using CopyTo
-                if not file_data:
-                    try:
-                        temp_path = os.path.join(os.environ['TEMP'], f"temp_{file_info['name']}")
-                        com_item.CopyTo(temp_path)
-                        if os.path.exists(temp_path):
-                            with open(temp_path, 'rb') as f:
-                                file_data = f.read()
-                            os.remove(temp_path)
-                            print(f"[_copy_com_simple] Got file data using CopyTo, size: {len(file_data) if file_data else 0}")
-                    except Exception as e:
-                        print(f"[_copy_com_simple] Error using CopyTo: {e}")
-                
-                # Write the data to the destination file
+                # Write the stream data to the destination file
                 if file_data:
-                    print(f"[_copy_com_simple] Writing data to {destination_file_path}")
+                    self.logger.debug("Writing data to %s", destination_file_path)
                     with open(destination_file_path, 'wb') as f:
                         f.write(file_data)
                     
                     # Verify the file was written
                     if os.path.exists(destination_file_path):
-                        print(f"[_copy_com_simple] File successfully written to {destination_file_path}")
+                        self.logger.debug("File successfully written to %s", destination_file_path)
                         return True
                     else:
-                        print(f"[_copy_com_simple] File was not written successfully")
+                        self.logger.debug("File was not written successfully")
                         return False
-                else:
-                    print(f"[_copy_com_simple] Could not get file data using any method")
-                    return False
+                
+                # Method 2: Try to get data using CopyTo, then move the temp file into place
+                # without loading it into memory. The temp file gets a unique name in the
+                # destination folder, so concurrent copies of same-named files from different
+                # camera folders cannot collide and the move is a rename on the same volume.
+                temp_path = None
+                try:
+                    fd, temp_path = tempfile.mkstemp(prefix='temp_', suffix=os.path.splitext(file_info['name'])[1],
+                                                     dir=dest_dir)
+                    os.close(fd)
+                    com_item.CopyTo(temp_path)
+                    # mkstemp already created the file, so an empty or short one means CopyTo
+                    # did nothing or has not finished; it is removed below, never moved into place
+                    copied_size = os.path.getsize(temp_path)
+                    expected_size = file_info.get('size')
+                    if copied_size == expected_size if expected_size else copied_size > 0:
+                        os.replace(temp_path, destination_file_path)
+                        temp_path = None
+                        self.logger.debug("Got file data using CopyTo, size: %s", copied_size)
+                        return True
+                    self.logger.warning("CopyTo produced %s bytes for %s (expected %s)",
+                                        copied_size, file_info['name'], expected_size or 'data')
+                except Exception as e:
+                    self.logger.error("Error using CopyTo: %s", e)
+                finally:
+                    if temp_path:
+                        try:
+                            os.remove(temp_path)
+                        except OSError:
+                            pass
+                
+                self.logger.warning("Could not get file data using any method")
+                return False
                 
             except Exception as e:
-                print(f"[_copy_com_simple] Error during file transfer: {e}")
-                import traceback
-                print(f"[_copy_com_simple] Traceback: {traceback.format_exc()}")
+                self.logger.error("Error during file transfer: %s", e)
+                self.logger.debug("Traceback", exc_info=True)
                 return False
             
         except Exception as e:
-            print(f"[_copy_com_simple] Error in _copy_com_simple: {e}")
-            import traceback
-            print(f"[_copy_com_simple] Traceback: {traceback.format_exc()}")
+            self.logger.error("Error in _copy_com_simple: %s", e)
+            self.logger.debug("Traceback", exc_info=True)
             return False
             
     def _copy_com_direct_to_destination(self, com_item, destination_file_path, file_info):
         """Copy COM item directly to destination"""
         try:
-            print(f"[_copy_com_direct_to_destination] Starting direct copy to {destination_file_path}")
+            self.logger.debug("Starting direct copy to %s", destination_file_path)
             
-            # Ensure destination directory exists
-            dest_dir = os.path.dirname(destination_file_path)
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir)
-                print(f"[_copy_com_direct_to_destination] Created destination directory: {dest_dir}")
+            # Destination directory is created up front by _create_destination_folders
+            dest_dir = file_info['_dest_dir']
             
             # Get the destination folder as a shell folder
-            shell = win32com.client.Dispatch("Shell.Application")
-            dest_folder = shell.NameSpace(dest_dir)
+            dest_folder = self._shell_namespace(dest_dir)
             
             if not dest_folder:
-                print(f"[_copy_com_direct_to_destination] Failed to get shell namespace for destination: {dest_dir}")
+                self.logger.warning("Failed to get shell namespace for destination: %s", dest_dir)
                 return False
             
             # Copy the file using CopyHere with maximum silence flags
-            print(f"[_copy_com_direct_to_destination] Copying to {dest_dir}")
+            self.logger.debug("Copying to %s", dest_dir)
             # Use all possible silence flags to suppress Windows dialogs completely
             # FOF_SILENT (4), FOF_NOCONFIRMATION (16), FOF_NOCONFIRMMKDIR (512), FOF_NOERRORUI (1024), FOF_NOCOPYSECURITYATTRIBS (2048)
             # Adding FOF_MULTIDESTFILES (1) and FOF_FILESONLY (128) for better compatibility
             silent_flags = 4 | 16 | 512 | 1024 | 2048 | 128
-            print(f"[_copy_com_direct_to_destination] Using flags: {silent_flags}")
-            dest_folder.CopyHere(com_item, silent_flags)
-            
-            # Wait for the file to appear with shorter timeout for better performance
-            timeout = 10  # seconds (reduced from 30)
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                if os.path.exists(destination_file_path):
-                    print(f"[_copy_com_direct_to_destination] File appeared at {destination_file_path}")
+            self.logger.debug("Using flags: %s", silent_flags)
+            # Start watching before the copy so its change notifications are not missed
+            watch = self._open_directory_watch(dest_dir)
+            try:
+                dest_folder.CopyHere(com_item, silent_flags)
+                
+                # Wait for the file to appear with shorter timeout for better performance
+                timeout = 10  # seconds (reduced from 30)
+                if self._wait_for_file(watch, destination_file_path, file_info.get('size', 0), timeout):
+                    self.logger.debug("File appeared at %s", destination_file_path)
                     return True
-                time.sleep(0.2)  # Check more frequently
+            finally:
+                self._close_directory_watch(watch)
             
             # Check one more time - sometimes files appear after timeout
             if os.path.exists(destination_file_path):
-                print(f"[_copy_com_direct_to_destination] File appeared after timeout: {destination_file_path}")
+                self.logger.debug("File appeared after timeout: %s", destination_file_path)
                 return True
             
-            print(f"[_copy_com_direct_to_destination] Timeout waiting for file to appear: {destination_file_path}")
+            self.logger.warning("Timeout waiting for file to appear: %s", destination_file_path)
             return False
             
         except Exception as e:
-            print(f"[_copy_com_direct_to_destination] Error in _copy_com_direct_to_destination: {e}")
-            import traceback
-            print(f"[_copy_com_direct_to_destination] Traceback: {traceback.format_exc()}")
+            self.logger.error("Error in _copy_com_direct_to_destination: %s", e)
+            self.logger.debug("Traceback", exc_info=True)
             return False
             
-    def _copy_com_via_drag_drop(self, com_item, destination_file_path, file_info):
-        """Copy COM item using drag and drop simulation"""
+    def _open_directory_watch(self, dest_dir):
+        """Open a directory for change notifications, returns (handle, overlapped) or None"""
         try:
-            print(f"[_copy_com_via_drag_drop] Starting drag and drop copy to {destination_file_path}")
-            
-            # Ensure destination directory exists
-            dest_dir = os.path.dirname(destination_file_path)
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir)
-                print(f"[_copy_com_via_drag_drop] Created destination directory: {dest_dir}")
-            
-            # Get the destination folder as a shell folder
-            shell = win32com.client.Dispatch("Shell.Application")
-            dest_folder = shell.NameSpace(dest_dir)
-            
-            if not dest_folder:
-                print(f"[_copy_com_via_drag_drop] Failed to get shell namespace for destination: {dest_dir}")
-                return False
-            
-            # Create a temporary folder for the source
-            temp_dir = os.path.join(os.environ['TEMP'], 'mtp_backup_temp')
-            if not os.path.exists(temp_dir):
-                os.makedirs(temp_dir)
-            
-            # Get the source folder
-            source_folder = shell.NameSpace(os.path.dirname(com_item.Path))
-            if not source_folder:
-                print(f"[_copy_com_via_drag_drop] Failed to get shell namespace for source")
-                return False
-            
-            # Copy using drag and drop
-            print(f"[_copy_com_via_drag_drop] Starting drag and drop operation")
-            source_folder.CopyHere(com_item, 4 | 16 | 512 | 1024 | 8192)  # All UI suppression flags
-            
-            # Wait for the file to appear
-            timeout = 30  # seconds
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                if os.path.exists(destination_file_path):
-                    print(f"[_copy_com_via_drag_drop] File appeared at {destination_file_path}")
-                    return True
-                time.sleep(0.5)
-            
-            print(f"[_copy_com_via_drag_drop] Timeout waiting for file to appear: {destination_file_path}")
-            return False
-            
+            handle = win32file.CreateFile(
+                dest_dir,
+                FILE_LIST_DIRECTORY,
+                win32file.FILE_SHARE_READ | win32file.FILE_SHARE_WRITE | win32file.FILE_SHARE_DELETE,
+                None,
+                win32file.OPEN_EXISTING,
+                win32file.FILE_FLAG_BACKUP_SEMANTICS | win32file.FILE_FLAG_OVERLAPPED,
+                None
+            )
+            overlapped = pywintypes.OVERLAPPED()
+            overlapped.hEvent = win32event.CreateEvent(None, True, False, None)
+            return handle, overlapped
         except Exception as e:
-            print(f"[_copy_com_via_drag_drop] Error in _copy_com_via_drag_drop: {e}")
-            import traceback
-            print(f"[_copy_com_via_drag_drop] Traceback: {traceback.format_exc()}")
+            self.logger.warning("Could not watch %s, falling back to polling: %s", dest_dir, e)
+            return None
+    
+    def _close_directory_watch(self, watch):
+        """Close a handle from _open_directory_watch, None is ignored"""
+        if watch is None:
+            return
+        handle, overlapped = watch
+        handle.Close()
+        overlapped.hEvent.Close()
+    
+    def _file_is_complete(self, file_path, expected_size):
+        """Check the file exists and, when the size is known, has been fully written"""
+        try:
+            size = os.stat(file_path).st_size
+        except OSError:
             return False
+        return not expected_size or size == expected_size
+    
+    def _wait_for_file(self, watch, file_path, expected_size, timeout):
+        """Wait until file_path exists with the expected size, returns False on timeout.
+        The watch stays open; the caller closes it."""
+        deadline = time.time() + timeout
+        
+        if watch is None:
+            while time.time() < deadline:
+                if self._file_is_complete(file_path, expected_size):
+                    return True
+                time.sleep(0.2)
+            return False
+        
+        handle, overlapped = watch
+        buffer = win32file.AllocateReadBuffer(8192)
+        target_name = os.path.normcase(os.path.basename(file_path))
+        check_file = True
+        try:
+            while True:
+                win32event.ResetEvent(overlapped.hEvent)
+                win32file.ReadDirectoryChangesW(handle, buffer, False, DIRECTORY_WATCH_FILTER, overlapped)
+                
+                # Checked after the read is queued so a change in between is not lost
+                if check_file and self._file_is_complete(file_path, expected_size):
+                    return True
+                
+                remaining_ms = int((deadline - time.time()) * 1000)
+                if remaining_ms <= 0:
+                    return False
+                if win32event.WaitForSingleObject(overlapped.hEvent, remaining_ms) != win32event.WAIT_OBJECT_0:
+                    return False
+                
+                nbytes = win32file.GetOverlappedResult(handle, overlapped, True)
+                # nbytes == 0 means the notification buffer overflowed, so check anyway
+                check_file = not nbytes or any(
+                    os.path.normcase(name) == target_name
+                    for _, name in win32file.FILE_NOTIFY_INFORMATION(buffer, nbytes)
+                )
+        finally:
+            try:
+                win32file.CancelIo(handle)
+                win32file.GetOverlappedResult(handle, overlapped, True)
+            except pywintypes.error:
+                pass
             
     def get_main_destination_folder(self, files_processed_list):
         """Get the main destination folder for the backup"""
@@ -410,7 +726,7 @@ class BackupWorker(QThread):
         if not dates:
             return self.destination_base
             
-        most_common_date = max(set(dates), key=dates.count)
+        most_common_date = Counter(dates).most_common(1)[0][0]
         return os.path.join(self.destination_base, most_common_date.strftime('%Y-%m-%d'))
         
     def check_drive_connectivity(self, path_to_check, is_destination=False):
@@ -423,12 +739,13 @@ class BackupWorker(QThread):
                 # For source, try to access the COM object
                 return True  # We'll handle MTP disconnection in the copy process
         except Exception as e:
-            print(f"Error checking drive connectivity: {e}")
+            self.logger.error("Error checking drive connectivity: %s", e)
             return False
             
     def stop(self):
         """Stop the backup process"""
         self.should_stop = True
+        self._cancel_copy.value = 1
         
     def is_potential_sd_card(self, drive_path, return_details=False):
         """Check if a drive is likely to be an SD card"""
@@ -453,16 +770,14 @@ class BackupWorker(QThread):
             return is_removable and 2 <= total_gb <= 2048
             
         except Exception as e:
-            print(f"Error checking SD card: {e}")
+            self.logger.error("Error checking SD card: %s", e)
             return False
             
     def copy_with_recovery(self, source, destination):
         """Copy a file with recovery options"""
         try:
-            # Ensure destination directory exists
-            dest_dir = os.path.dirname(destination)
-            if not os.path.exists(dest_dir):
-                os.makedirs(dest_dir)
+            # Ensure destination directory exists - it is not one run() created up front
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
             
             # Copy the file
             shutil.copy2(source, destination)
@@ -474,30 +789,52 @@ class BackupWorker(QThread):
             return False
             
         except Exception as e:
-            print(f"Error in copy_with_recovery: {e}")
+            self.logger.error("Error in copy_with_recovery: %s", e)
             return False
             
     def _create_destination_folders(self, files_list):
         """Create destination folders for the backup"""
         try:
             # Get unique destination directories from files
-            destination_dirs = set()
-            for file_info in files_list:
-                destination_file = file_info.get('destination')
-                if destination_file:
-                    dest_dir = os.path.dirname(destination_file)
-                    destination_dirs.add(dest_dir)
-            
-            # Create all destination directories
+            destination_dirs = {f['_dest_dir'] for f in files_list if f.get('_dest_dir')}
+            
+            # makedirs creates the parents too, so only directories that are not
+            # a parent of another destination directory need a call
+            parent_dirs = set()
             for dest_dir in destination_dirs:
-                if not os.path.exists(dest_dir):
+                parent = os.path.dirname(dest_dir)
+                while parent and parent not in parent_dirs and parent != os.path.dirname(parent):
+                    parent_dirs.add(parent)
+                    parent = os.path.dirname(parent)
+            
+            # Create all destination directories (exist_ok makes a separate exists check redundant).
+            # A failure is logged and left to the copy of that folder's files to report.
+            for dest_dir in sorted(destination_dirs - parent_dirs):
+                try:
                     os.makedirs(dest_dir, exist_ok=True)
-                    print(f"Created folder: {dest_dir}")
+                except OSError as e:
+                    self.logger.error("Error creating destination folder %s: %s", dest_dir, e)
+            self.logger.debug("Destination folders ready: %s", len(destination_dirs))
+            
+            return destination_dirs
                     
         except Exception as e:
-            print(f"Error creating destination folders: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            self.logger.error("Error creating destination folders: %s", e)
+            self.logger.debug("Traceback", exc_info=True)
+            return set()
+    
+    def _list_existing_files(self, destination_dirs):
+        """Read each destination directory once, returns {dir: set of normcased file names}.
+        A directory that cannot be listed maps to None."""
+        existing_files = {}
+        for dest_dir in destination_dirs:
+            try:
+                with os.scandir(dest_dir) as entries:
+                    existing_files[dest_dir] = {os.path.normcase(entry.name) for entry in entries}
+            except OSError as e:
+                self.logger.error("Error listing destination folder %s: %s", dest_dir, e)
+                existing_files[dest_dir] = None
+        return existing_files
             
 class BackupValidator:
     @staticmethod
@@ -513,7 +850,7 @@ class BackupValidator:
             }
             
             for file_info in source_files:
-                dest_path = os.path.join(destination_base, file_info['name'])
+                dest_path = file_info.get('destination') or os.path.join(destination_base, file_info['name'])
                 
                 if not os.path.exists(dest_path):
                     results['missing_files'].append(file_info['name'])
@@ -522,6 +859,12 @@ class BackupValidator:
                 if os.path.getsize(dest_path) != file_info.get('size', 0):
                     results['size_mismatches'].append(file_info['name'])
                     continue
+                
+                # The source digest was taken during the copy, so only the destination is read here
+                src_hash = file_info.get('src_hash')
+                if src_hash and BackupValidator.get_file_hash(dest_path) != src_hash:
+                    results['hash_mismatches'].append(file_info['name'])
+                    continue
                     
                 results['validated_files'] += 1
                 
@@ -530,6 +873,20 @@ class BackupValidator:
         except Exception as e:
             print(f"Error validating backup: {e}")
             return None
+    
+    @staticmethod
+    def get_file_hash(path, chunk_size=1024*1024):
+        """Calculate the HASH_ALGORITHM digest of a file"""
+        with open(path, 'rb', buffering=0) as f:
+            if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+                return hashlib.file_digest(f, HASH_ALGORITHM).hexdigest()
+            
+            hasher = hashlib.new(HASH_ALGORITHM)
+            buf = bytearray(chunk_size)
+            mv = memoryview(buf)
+            while n := f.readinto(buf):
+                hasher.update(mv[:n])
+            return hasher.hexdigest()
             
     @staticmethod
     def generate_validation_report(validation_result, output_path=None):
@@ -594,15 +951,23 @@ class ResourceManager:
         self.com_objects = []
         
 class FileOperationManager:
+    # One lock per normalized path. Entries are weak, so a lock lives exactly as long as
+    # someone holds or waits on it and long sessions don't grow the table forever.
+    _locks = weakref.WeakValueDictionary()
+    # Serializes lock lookups so two threads never build two locks for one path
+    _registry_lock = Lock()
+    
     def __init__(self):
         """Initialize file operation manager"""
-        self.locks = {}
         
     def get_operation_lock(self, path):
         """Get a lock for a file operation"""
-        if path not in self.locks:
-            self.locks[path] = Lock()
-        return self.locks[path]
+        key = os.path.normcase(os.path.abspath(path))
+        with self._registry_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = Lock()
+            return lock
         
     def perform_operation(self, path, operation):
         """Perform a file operation with locking"""
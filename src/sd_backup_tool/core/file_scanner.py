@@ -6,18 +6,17 @@ Scans and classifies media files from filesystem and MTP devices.
 
 import os
 import hashlib
+import mmap
 from datetime import datetime
-from PIL import Image
-from PIL.ExifTags import TAGS
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
-import mimetypes # Not actively used, but kept for potential future use
-import shutil
 import re
-import sys
+import sqlite3
 import time
+import win32api
 import win32com.client
-import win32file
+from concurrent.futures import ThreadPoolExecutor
 from threading import Lock
+from .logging_setup import configure_logger
 
 try:
     import win32com.client
@@ -26,6 +25,56 @@ except ImportError:
     COM_AVAILABLE = False
     print("WARNING: win32com not available - MTP scanning disabled")
 
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    # BLAKE2b is in the standard library and still much faster than MD5 on 64-bit CPUs
+    BLAKE3_AVAILABLE = False
+DEDUP_HASH_ALGORITHM = 'blake3' if BLAKE3_AVAILABLE else 'blake2b'
+
+PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.heic', '.webp', '.tiff', '.tif'}
+RAW_EXTENSIONS = {'.cr2', '.nef', '.arw', '.orf', '.rw2', '.dng', '.raf', '.sr2', '.pef', '.raw', '.crw', '.cr3'}
+VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.mts', '.m2ts', '.wmv', '.flv', '.3gp', '.m4v', '.mpg', '.mpeg'}
+# Lowercased extension -> file type, so classifying a file is one dict lookup
+_EXT_TABLE = ({ext: 'photo' for ext in PHOTO_EXTENSIONS}
+              | {ext: 'raw' for ext in RAW_EXTENSIONS}
+              | {ext: 'video' for ext in VIDEO_EXTENSIONS})
+
+# Lowercased camera file name prefixes (Sony, iPhone, Panasonic, Olympus), used for
+# files whose extension is missing or not recognized
+_CAM_PREFIXES = ('dsc', 'img_', 'p101', 'pict', 'pana')
+# Sidecar and thumbnail files cameras and phones write next to the media; they share
+# the camera prefixes but are not media themselves
+_SIDECAR_EXTENSIONS = frozenset({'.aae', '.thm', '.xmp', '.lrv', '.xml', '.ctg', '.ind', '.bin'})
+
+def _classify(name):
+    """Media type of a file name ('photo', 'raw', 'video' or 'camera'), None if not media.
+    The one classifier shared by FileScanner and ScanWorkerThread."""
+    lo = name.lower()
+    i = lo.rfind('.')
+    if i >= 0:
+        ext = lo[i:]
+        file_type = _EXT_TABLE.get(ext)
+        if file_type:
+            return file_type
+        if ext in _SIDECAR_EXTENSIONS:
+            return None
+    # Camera files without extension or with unrecognized extension
+    if lo.startswith(_CAM_PREFIXES):
+        return 'camera'
+    return None
+
+def _com_property(item, name, default):
+    """Read a COM property once, default if the device doesn't support it"""
+    try:
+        return getattr(item, name)
+    except Exception:
+        return default
+
+# Date folder pattern YYYY-MM-DD used by cameras and phones
+_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
 class FileScanner(QObject):
     """File scanner - dispatches scan requests."""
     
@@ -33,16 +82,13 @@ class FileScanner(QObject):
     scan_error = pyqtSignal(str)
     scan_progress = pyqtSignal(int, int)
     
-    PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.gif', '.heic', '.webp', '.tiff', '.tif'}
-    RAW_EXTENSIONS = {'.cr2', '.nef', '.arw', '.orf', '.rw2', '.dng', '.raf', '.sr2', '.pef', '.raw', '.crw', '.cr3'}
-    VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.mts', '.m2ts', '.wmv', '.flv', '.3gp', '.m4v', '.mpg', '.mpeg'}
-    
     def __init__(self):
         super().__init__()
         self.scan_thread = None
         self.scan_cache = {}
         self.cache_lock = Lock()
         self.cache_timeout = 300  # Cache results for 5 minutes
+        self.logger = configure_logger('ScanWorker')  # Same logger as the scan workers
     
     def start_scan(self, target_path_or_id):
         """Start a new scan"""
@@ -94,8 +140,13 @@ class FileScanner(QObject):
                 'total_files': len(result),
                 'error': None
             }
+            cache_entry = {
+                'result': result_dict,
+                'ts': time.monotonic(),
+                'signature': self._target_signature(target_id)
+            }
             with self.cache_lock:
-                self.scan_cache[target_id] = result_dict
+                self.scan_cache[target_id] = cache_entry
             self.scan_completed.emit(result_dict)
     
     def clear_cache(self, target_id=None):
@@ -111,44 +162,11 @@ class FileScanner(QObject):
 
     def _is_media_file(self, filename):
         """Check if a file is a media file"""
-        try:
-            # Convert to lowercase for case-insensitive comparison
-            filename_lower = filename.lower()
-            
-            # Check for known extensions
-            ext = os.path.splitext(filename_lower)[1]
-            if ext in self.PHOTO_EXTENSIONS or ext in self.RAW_EXTENSIONS or ext in self.VIDEO_EXTENSIONS:
-                return True
-                
-            # Special handling for camera files that might not have extensions
-            # Sony cameras often use DSC prefix
-            if filename_lower.startswith('dsc'):
-                return True
-                
-            return False
-        except Exception as e:
-            print(f"Error checking if file is media: {e}")
-            return False
+        return _classify(filename) is not None
 
     def _get_file_type(self, filename):
         """Get the type of a file"""
-        try:
-            filename_lower = filename.lower()
-            ext = os.path.splitext(filename_lower)[1]
-            
-            if ext in self.PHOTO_EXTENSIONS:
-                return 'photo'
-            elif ext in self.RAW_EXTENSIONS:
-                return 'raw'
-            elif ext in self.VIDEO_EXTENSIONS:
-                return 'video'
-            elif filename_lower.startswith('dsc'):
-                return 'camera'  # Special type for camera files
-            else:
-                return 'unknown'
-        except Exception as e:
-            print(f"Error getting file type: {e}")
-            return 'unknown'
+        return _classify(filename) or 'unknown'
 
     def _get_creation_date(self, item):
         """Get creation date from COM item"""
@@ -168,8 +186,40 @@ class FileScanner(QObject):
             print(f"Error getting creation date: {e}")
             return datetime.now()
 
+    def _target_signature(self, target_id):
+        """Cheap change marker for a scan target, None if it cannot be trusted (MTP).
+        The volume serial catches a swapped card. The media folders (the target itself,
+        DCIM and PRIVATE) and each of their sub-folders contribute their mtime and entry
+        count; the count catches new files on FAT/exFAT, where folder mtimes are unreliable."""
+        if target_id.startswith("MTP"):
+            return None
+        try:
+            drive = os.path.splitdrive(os.path.abspath(target_id))[0]
+            signature = [win32api.GetVolumeInformation(drive + '\\')[1]]
+            for folder in (target_id, os.path.join(target_id, 'DCIM'), os.path.join(target_id, 'PRIVATE')):
+                try:
+                    with os.scandir(folder) as entries:
+                        children = list(entries)
+                except FileNotFoundError:
+                    continue
+                signature.append((folder, os.stat(folder).st_mtime_ns, len(children)))
+                for entry in children:
+                    if entry.is_dir():
+                        signature.append((entry.name, entry.stat().st_mtime_ns, len(os.listdir(entry.path))))
+            return tuple(signature)
+        except Exception:
+            return None
+
     def scan_target(self, target_id, force_rescan=False):
-        """Start a scan for a specific target"""
+        """Start a scan for a specific target, reusing a recent result when it is still valid"""
+        with self.cache_lock:
+            entry = self.scan_cache.get(target_id)
+        if (entry and not force_rescan and entry['signature'] is not None
+                and time.monotonic() - entry['ts'] < self.cache_timeout
+                and entry['signature'] == self._target_signature(target_id)):
+            self.logger.debug("Using cached scan result for: %s", target_id)
+            self.scan_completed.emit(entry['result'])
+            return
         self.start_scan(target_id)
 
 class ScanWorkerThread(QThread):
@@ -177,29 +227,23 @@ class ScanWorkerThread(QThread):
     scan_completed = pyqtSignal(list)
     scan_error = pyqtSignal(str)
     
+    # Progress is emitted at most every 50 ms or every 64 files
+    PROGRESS_INTERVAL = 0.05
+    PROGRESS_BATCH = 64
+    
     def __init__(self, path, is_mtp=False):
         super().__init__()
         self.path = path
         self.is_mtp = is_mtp
         self.should_stop = False
+        self._last_emit = 0.0
+        self._last_emit_count = 0
         self.setup_logging()
         
     def setup_logging(self):
         """Setup logging for the worker"""
-        import logging
-        self.logger = logging.getLogger('ScanWorker')
-        self.logger.setLevel(logging.INFO)
-        
-        # Create console handler
-        ch = logging.StreamHandler()
-        ch.setLevel(logging.INFO)
-        
-        # Create formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        ch.setFormatter(formatter)
-        
-        # Add handler to logger
-        self.logger.addHandler(ch)
+        # Per-item messages are debug level; set SDBACKUP_LOGLEVEL=DEBUG to see them
+        self.logger = configure_logger('ScanWorker')
         
     def run(self):
         """Main scanning process"""
@@ -210,13 +254,13 @@ class ScanWorkerThread(QThread):
                 self._scan_filesystem()
                 
         except Exception as e:
-            print(f"Error in scan process: {e}")
+            self.logger.error("Error in scan process: %s", e)
             self.scan_error.emit(str(e))
             
     def _scan_mtp_device(self):
         """Scan an MTP device using COM"""
         try:
-            print(f"[_scan_mtp_device] Starting MTP scan for: {self.path}")
+            self.logger.info("Starting MTP scan for: %s", self.path)
             
             # Get the device using COM
             shell = win32com.client.Dispatch("Shell.Application")
@@ -225,46 +269,48 @@ class ScanWorkerThread(QThread):
             # Find the MTP device
             device = None
             device_name = self.path.replace("MTP:", "")  # Remove the prefix if present
-            print(f"[_scan_mtp_device] Looking for device: {device_name}")
+            self.logger.debug("Looking for device: %s", device_name)
             
             for item in computer.Items():
                 try:
-                    if item.Name and item.Path and "::" in item.Path:
-                        print(f"[_scan_mtp_device] Checking item: {item.Name}")
-                        if item.Name == device_name:
+                    # Read each property once - every access is a COM call
+                    item_name = item.Name
+                    if item_name and "::" in (item.Path or ""):
+                        self.logger.debug("Checking item: %s", item_name)
+                        if item_name == device_name:
                             device = item
-                            print(f"[_scan_mtp_device] Found matching device: {item.Name}")
+                            self.logger.debug("Found matching device: %s", item_name)
                             break
                 except Exception as e:
-                    print(f"[_scan_mtp_device] Error checking item: {e}")
+                    self.logger.error("Error checking item: %s", e)
                     continue
             
             if not device:
-                print(f"[_scan_mtp_device] Device not found: {device_name}")
+                self.logger.warning("Device not found: %s", device_name)
                 self.scan_error.emit(f"Device not found: {device_name}")
                 return
             
-            print(f"[_scan_mtp_device] Found device: {device.Name}")
+            self.logger.debug("Found device: %s", device.Name)
             
             # Get the device folder
             try:
                 device_folder = device.GetFolder
                 if not device_folder:
-                    print(f"[_scan_mtp_device] Could not get device folder")
+                    self.logger.warning("Could not get device folder")
                     self.scan_error.emit("Could not access device folder")
                     return
                 
                 # Try to get the root folder items
                 try:
                     items = device_folder.Items()
-                    print(f"[_scan_mtp_device] Successfully got root folder items")
+                    self.logger.debug("Successfully got root folder items")
                 except Exception as e:
-                    print(f"[_scan_mtp_device] Error getting root folder items: {e}")
+                    self.logger.error("Error getting root folder items: %s", e)
                     self.scan_error.emit(f"Error accessing device contents: {e}")
                     return
                 
             except Exception as e:
-                print(f"[_scan_mtp_device] Error getting device folder: {e}")
+                self.logger.error("Error getting device folder: %s", e)
                 self.scan_error.emit(f"Error accessing device folder: {e}")
                 return
             
@@ -279,225 +325,220 @@ class ScanWorkerThread(QThread):
                     return
                 
                 try:
-                    items = folder.Items()
-                    print(f"[_scan_mtp_device] Scanning folder: {current_path}, found {len(items)} items")
+                    # Enumerate once - len() and iteration on the live collection
+                    # each go back to the device
+                    items_list = list(folder.Items())
+                    self.logger.debug("Scanning folder: %s, found %s items", current_path, len(items_list))
                     
-                    for item in items:
+                    for item in items_list:
                         if self.should_stop:
                             return
                         
+                        name = None
                         try:
-                            item_path = os.path.join(current_path, item.Name)
-                            print(f"[_scan_mtp_device] Processing item: {item_path}")
+                            # Every property read is a round-trip to the device, so read each once
+                            name = item.Name
+                            # Informational device path (logging, date folder lookup), not a real
+                            # file system path, so plain concatenation is enough
+                            item_path = f"{current_path}\\{name}" if current_path else name
+                            self.logger.debug("Processing item: %s", item_path)
                             
-                            # Check if it's a folder
-                            try:
-                                is_folder = item.IsFolder
-                            except:
-                                # Some MTP devices might not support IsFolder property
-                                try:
-                                    subfolder = item.GetFolder
-                                    is_folder = True
-                                except:
-                                    is_folder = False
-                            
-                            if is_folder:
-                                print(f"[_scan_mtp_device] Found folder: {item_path}")
+                            if _com_property(item, 'IsFolder', False):
+                                self.logger.debug("Found folder: %s", item_path)
                                 # Recursively scan subfolder
                                 try:
                                     subfolder = item.GetFolder
                                     if subfolder:
                                         scan_folder(subfolder, item_path)
                                 except Exception as e:
-                                    print(f"[_scan_mtp_device] Error accessing subfolder {item_path}: {e}")
-                            else:
-                                # Check if it's a media file
-                                if self._is_media_file(item.Name):
-                                    print(f"[_scan_mtp_device] Found media file: {item_path}")
-                                    try:
-                                        # Get file size
-                                        try:
-                                            size = item.Size
-                                        except:
-                                            # Some MTP devices might not support Size property
-                                            size = 0
-                                        
-                                        # Get creation date - try from path first, then COM
-                                        try:
-                                            creation_date = self._extract_date_from_path(item_path)
-                                            if creation_date is None:
-                                                creation_date = self._get_creation_date(item)
-                                                if creation_date is None:
-                                                    creation_date = datetime.now()
-                                                    print(f"[_scan_mtp_device] No creation date found for {item.Name}, using current date")
-                                        except Exception as e:
-                                            print(f"[_scan_mtp_device] Error getting creation date for {item.Name}: {e}")
-                                            creation_date = datetime.now()
-                                        
-                                        # For MTP files, try to get the real file name with extension
-                                        real_name = item.Name
-                                        try:
-                                            # Try to get extended property for real file name
-                                            # Some MTP devices hide extensions in Name but have them in other properties
-                                            if hasattr(item, 'ExtendedProperty'):
-                                                try:
-                                                    real_filename = item.ExtendedProperty("System.FileName")
-                                                    if real_filename and '.' in real_filename:
-                                                        real_name = real_filename
-                                                        print(f"[_scan_mtp_device] Got real filename: {real_filename}")
-                                                except:
-                                                    pass
-                                        except:
-                                            pass
-                                        
-                                        # If still no extension and it's a DSC file, assume it's ARW
-                                        if real_name.startswith('DSC') and '.' not in real_name:
-                                            real_name = real_name + '.ARW'
-                                            print(f"[_scan_mtp_device] Sony camera file detected, assuming ARW extension: {real_name}")
-                                        
-                                        # Get file type and add debug logging
-                                        detected_type = self._get_file_type(real_name)
-                                        print(f"[_scan_mtp_device] File {item.Name} -> {real_name} detected as type: {detected_type}")
-                                        
-                                        file_info = {
-                                            'name': real_name,  # Use real name with extension
-                                            'original_name': item.Name,  # Keep original for reference
-                                            'path': item_path,
-                                            'size': size,
-                                            'type': detected_type,
-                                            'creation_date': creation_date,
-                                            'is_mtp': True,
-                                            'com_item': item
-                                        }
-                                        media_files.append(file_info)
-                                        total_size_bytes += size
-                                        
-                                        # Emit progress
-                                        self.progress_updated.emit(len(media_files), total_size_bytes)
-                                    except Exception as e:
-                                        print(f"[_scan_mtp_device] Error processing media file {item_path}: {e}")
+                                    self.logger.error("Error accessing subfolder %s: %s", item_path, e)
+                                continue
+                            
+                            # Check if it's a media file
+                            if not self._is_media_file(name):
+                                continue
+                            
+                            self.logger.debug("Found media file: %s", item_path)
+                            # Some MTP devices might not support the Size property
+                            size = _com_property(item, 'Size', 0)
+                            
+                            # Get creation date - try from path first, then COM
+                            try:
+                                creation_date = self._extract_date_from_path(item_path)
+                                if creation_date is None:
+                                    creation_date = self._get_creation_date(item, name)
+                                    if creation_date is None:
+                                        creation_date = datetime.now()
+                                        self.logger.debug("No creation date found for %s, using current date", name)
+                            except Exception as e:
+                                self.logger.error("Error getting creation date for %s: %s", name, e)
+                                creation_date = datetime.now()
+                            
+                            # For MTP files, try to get the real file name with extension
+                            # Some MTP devices hide extensions in Name but have them in other properties
+                            real_name = name
+                            try:
+                                real_filename = item.ExtendedProperty("System.FileName")
+                                if real_filename and '.' in real_filename:
+                                    real_name = real_filename
+                                    self.logger.debug("Got real filename: %s", real_filename)
+                            except Exception:
+                                pass
+                            
+                            # If still no extension and it's a DSC file, assume it's ARW
+                            if real_name.lower().startswith('dsc') and '.' not in real_name:
+                                real_name = real_name + '.ARW'
+                                self.logger.debug("Sony camera file detected, assuming ARW extension: %s", real_name)
+                            
+                            # Get file type and add debug logging
+                            detected_type = self._get_file_type(real_name)
+                            self.logger.debug("File %s -> %s detected as type: %s", name, real_name, detected_type)
+                            
+                            file_info = {
+                                'name': real_name,  # Use real name with extension
+                                'original_name': name,  # Keep original for reference
+                                'path': item_path,
+                                'size': size,
+                                'type': detected_type,
+                                'creation_date': creation_date,
+                                'is_mtp': True,
+                                'com_item': item
+                            }
+                            media_files.append(file_info)
+                            total_size_bytes += size
+                            
+                            # Emit progress
+                            self._maybe_emit_progress(len(media_files), total_size_bytes)
                                     
                         except Exception as e:
-                            print(f"[_scan_mtp_device] Error processing item {item.Name}: {e}")
+                            self.logger.error("Error processing item %s: %s", name, e)
                             continue
                             
                 except Exception as e:
-                    print(f"[_scan_mtp_device] Error scanning folder {current_path}: {e}")
+                    self.logger.error("Error scanning folder %s: %s", current_path, e)
                     return
             
             # Start scanning from root
             scan_folder(device_folder)
             
             if not self.should_stop:
-                print(f"[_scan_mtp_device] Scan complete. Found {len(media_files)} media files")
+                self.logger.info("Scan complete. Found %s media files", len(media_files))
+                self.progress_updated.emit(len(media_files), total_size_bytes)
                 self.scan_completed.emit(media_files)
                 
         except Exception as e:
-            print(f"[_scan_mtp_device] Error in MTP scan: {e}")
-            import traceback
-            print(f"[_scan_mtp_device] Traceback: {traceback.format_exc()}")
+            self.logger.error("Error in MTP scan: %s", e)
+            self.logger.debug("Traceback", exc_info=True)
             self.scan_error.emit(str(e))
             
     def _scan_filesystem(self):
         """Scan a filesystem path"""
         try:
-            print(f"[_scan_filesystem] Starting filesystem scan for: {self.path}")
+            self.logger.info("Starting filesystem scan for: %s", self.path)
             
             media_files = []
             total_size_bytes = 0
             
-            for root, dirs, files in os.walk(self.path):
+            # Walk with scandir and an explicit stack: DirEntry answers is_dir() from the
+            # directory listing and stat() needs one call for both size and ctime
+            # creation_date is only used for day folders, so share one datetime per
+            # 15 minute bucket - time zone offsets and DST changes fall on 15 minute
+            # boundaries, so every file in a bucket has the same local date
+            date_cache = {}
+            
+            stack = [self.path]
+            while stack:
                 if self.should_stop:
                     break
+                
+                root = stack.pop()
+                try:
+                    entries = os.scandir(root)
+                except OSError as e:
+                    # os.walk skipped unreadable folders silently as well
+                    self.logger.error("Error listing folder %s: %s", root, e)
+                    continue
                     
-                for file in files:
-                    if self.should_stop:
-                        break
-                        
-                    try:
-                        if self._is_media_file(file):
-                            file_path = os.path.join(root, file)
-                            file_info = {
-                                'name': file,
-                                'path': file_path,
-                                'size': os.path.getsize(file_path),
-                                'type': self._get_file_type(file),
-                                'creation_date': datetime.fromtimestamp(os.path.getctime(file_path)),
-                                'is_mtp': False
-                            }
-                            media_files.append(file_info)
-                            total_size_bytes += file_info['size']
+                with entries:
+                    for entry in entries:
+                        if self.should_stop:
+                            break
                             
-                            # Emit progress
-                            self.progress_updated.emit(len(media_files), total_size_bytes)
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
                             
-                    except Exception as e:
-                        print(f"[_scan_filesystem] Error processing file {file}: {e}")
-                        continue
+                            # One table lookup both filters and classifies the file
+                            file_type = self._get_file_type(entry.name)
+                            if file_type != 'unknown':
+                                st = entry.stat()
+                                bucket = int(st.st_ctime) // 900
+                                creation_date = date_cache.get(bucket)
+                                if creation_date is None:
+                                    creation_date = date_cache[bucket] = datetime.fromtimestamp(bucket * 900)
+                                file_info = {
+                                    'name': entry.name,
+                                    'path': entry.path,
+                                    'size': st.st_size,
+                                    'type': file_type,
+                                    'creation_date': creation_date,
+                                    'is_mtp': False
+                                }
+                                media_files.append(file_info)
+                                total_size_bytes += file_info['size']
+                                
+                                # Emit progress
+                                self._maybe_emit_progress(len(media_files), total_size_bytes)
+                                
+                        except Exception as e:
+                            self.logger.error("Error processing file %s: %s", entry.name, e)
+                            continue
                         
             if not self.should_stop:
-                print(f"[_scan_filesystem] Scan complete. Found {len(media_files)} media files")
+                self.logger.info("Scan complete. Found %s media files", len(media_files))
+                self.progress_updated.emit(len(media_files), total_size_bytes)
                 self.scan_completed.emit(media_files)
                 
         except Exception as e:
-            print(f"[_scan_filesystem] Error in filesystem scan: {e}")
-            import traceback
-            print(f"[_scan_filesystem] Traceback: {traceback.format_exc()}")
+            self.logger.error("Error in filesystem scan: %s", e)
+            self.logger.debug("Traceback", exc_info=True)
             self.scan_error.emit(str(e))
             
     def stop(self):
         """Stop the scanning process"""
         self.should_stop = True
+        
+    def _maybe_emit_progress(self, file_count, total_size_bytes):
+        """Emit progress_updated only every PROGRESS_BATCH files or PROGRESS_INTERVAL seconds,
+        each emit is a queued call that wakes the GUI thread"""
+        now = time.monotonic()
+        if (now - self._last_emit >= self.PROGRESS_INTERVAL
+                or file_count - self._last_emit_count >= self.PROGRESS_BATCH):
+            self._last_emit = now
+            self._last_emit_count = file_count
+            self.progress_updated.emit(file_count, total_size_bytes)
 
     def _is_media_file(self, name):
         """Check if a file is a media file based on name and extension"""
-        # Convert to lowercase for case-insensitive comparison
-        name_lower = name.lower()
-        
-        # Check for Sony camera files (DSC prefix)
-        if name.startswith('DSC'):
-            return True
-            
-        # Check for common media extensions
-        media_extensions = {
-            # Photos
-            '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif',
-            # Raw formats
-            '.raw', '.arw', '.cr2', '.nef', '.dng',
-            # Videos
-            '.mp4', '.mov', '.avi', '.wmv', '.mkv'
-        }
-        
-        return any(name_lower.endswith(ext) for ext in media_extensions)
+        return _classify(name) is not None
 
     def _get_file_type(self, name):
         """Determine the type of file based on name and extension"""
-        name_lower = name.lower()
-        
-        # Check extensions first (more specific)
-        if any(name_lower.endswith(ext) for ext in ['.raw', '.arw', '.cr2', '.nef', '.dng']):
-            return 'raw'
-        elif any(name_lower.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif']):
-            return 'photo'
-        elif any(name_lower.endswith(ext) for ext in ['.mp4', '.mov', '.avi', '.wmv', '.mkv']):
-            return 'video'
-        # Sony camera files without extension or with unrecognized extension
-        elif name.startswith('DSC'):
-            return 'camera'
-            
-        return 'unknown'
+        return _classify(name) or 'unknown'
 
-    def _get_creation_date(self, com_item):
-        """Get creation date from COM item using multiple methods"""
+    def _get_creation_date(self, com_item, name=None):
+        """Get creation date from COM item using multiple methods.
+        name is the already-read item name, used for logging without another COM call."""
         try:
             # Method 1: Try direct DateCreated property
             try:
                 date_created = com_item.DateCreated
                 if date_created:
-                    print(f"[_get_creation_date] Got DateCreated: {date_created}")
+                    self.logger.debug("Got DateCreated: %s", date_created)
                     return date_created
             except Exception as e:
-                print(f"[_get_creation_date] DateCreated failed: {e}")
+                self.logger.debug("DateCreated failed: %s", e)
             
             # Method 2: Try getting date from properties
             try:
@@ -505,14 +546,16 @@ class ScanWorkerThread(QThread):
                 for i in range(min(props.Count, 50)):  # Limit iterations for performance
                     try:
                         prop = props.Item(i)
-                        if 'Date' in prop.Name or 'Created' in prop.Name:
-                            if prop.Value:
-                                print(f"[_get_creation_date] Got from property {prop.Name}: {prop.Value}")
-                                return prop.Value
+                        prop_name = prop.Name
+                        if 'Date' in prop_name or 'Created' in prop_name:
+                            prop_value = prop.Value
+                            if prop_value:
+                                self.logger.debug("Got from property %s: %s", prop_name, prop_value)
+                                return prop_value
                     except:
                         continue
             except Exception as e:
-                print(f"[_get_creation_date] Properties method failed: {e}")
+                self.logger.debug("Properties method failed: %s", e)
                     
             # Method 3: Try ModifyDate
             try:
@@ -520,119 +563,242 @@ class ScanWorkerThread(QThread):
                 if modify_date:
                     # Check if it's a valid date (not the COM default 1899-12-30)
                     if modify_date.year > 1900:
-                        print(f"[_get_creation_date] Got valid ModifyDate: {modify_date}")
+                        self.logger.debug("Got valid ModifyDate: %s", modify_date)
                         return modify_date
                     else:
-                        print(f"[_get_creation_date] Invalid ModifyDate (COM default): {modify_date}")
+                        self.logger.debug("Invalid ModifyDate (COM default): %s", modify_date)
             except Exception as e:
-                print(f"[_get_creation_date] ModifyDate failed: {e}")
+                self.logger.debug("ModifyDate failed: %s", e)
             
-            print(f"[_get_creation_date] No date found for {com_item.Name}")
+            self.logger.debug("No date found for %s", name)
             return None
             
         except Exception as e:
-            print(f"[_get_creation_date] All methods failed for {com_item.Name}: {e}")
+            self.logger.warning("All methods failed for %s: %s", name, e)
             return None
 
     def _extract_date_from_path(self, file_path):
         """Extract date from file path like 'Storage Media\\2025-06-03\\DSC00519'"""
         try:
-            import re
             # Look for date pattern YYYY-MM-DD in the path
-            date_pattern = r'(\d{4})-(\d{2})-(\d{2})'
-            match = re.search(date_pattern, file_path)
-            if match:
-                year, month, day = match.groups()
-                extracted_date = datetime(int(year), int(month), int(day))
-                print(f"[_extract_date_from_path] Extracted date from path '{file_path}': {extracted_date}")
-                return extracted_date
-            else:
-                print(f"[_extract_date_from_path] No date pattern found in path: {file_path}")
-                return None
+            match = _DATE_RE.search(file_path)
+            return datetime(*map(int, match.groups())) if match else None
         except Exception as e:
-            print(f"[_extract_date_from_path] Error extracting date from path '{file_path}': {e}")
+            self.logger.error("Error extracting date from path '%s': %s", file_path, e)
             return None
 
+class HashCache:
+    """Persistent path -> (size, mtime_ns, digest) map kept next to the backup root,
+    so files that haven't changed since the last run are not read again"""
+    
+    FILENAME = '.sdbackup_hashes.sqlite'
+    COMMIT_EVERY = 100
+    
+    def __init__(self, destination_base):
+        self.lock = Lock()
+        self.pending = 0
+        # One connection shared by the hashing threads, serialized by self.lock
+        self.conn = sqlite3.connect(os.path.join(destination_base, self.FILENAME), check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS hashes ('
+                          'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, '
+                          'algorithm TEXT, digest TEXT)')
+        
+    def get(self, path, st):
+        """Cached digest for path if its size and mtime still match, else None"""
+        with self.lock:
+            row = self.conn.execute('SELECT size, mtime_ns, algorithm, digest FROM hashes WHERE path = ?',
+                                    (path,)).fetchone()
+        if row and row[:3] == (st.st_size, st.st_mtime_ns, DEDUP_HASH_ALGORITHM):
+            return row[3]
+        return None
+        
+    def put(self, path, st, digest):
+        """Store a digest, replacing any stale entry for path"""
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)',
+                              (path, st.st_size, st.st_mtime_ns, DEDUP_HASH_ALGORITHM, digest))
+            self.pending += 1
+            if self.pending >= self.COMMIT_EVERY:
+                self.conn.commit()
+                self.pending = 0
+                
+    def close(self):
+        """Commit outstanding entries and close the database"""
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
 class FileDeduplicator:
+    # Top-level destination folder prefix per file type
+    # (camera files default to Photos initially - will be moved if needed)
+    FOLDER_PREFIX = {'photo': 'Photos', 'raw': 'Raw', 'video': 'Videos', 'camera': 'Photos'}
+    
     @staticmethod
-    def get_file_hash(source_info, chunk_size=8192):
+    def get_file_hash(source_info, chunk_size=1024 * 1024, cache=None):
         """
-        Calculate MD5 hash of a file from a filesystem path.
+        Calculate the content hash of a file from a filesystem path - BLAKE3 when the
+        blake3 package is installed, BLAKE2b otherwise. With a HashCache, unchanged
+        files (same size and mtime) reuse the digest from an earlier run.
         For MTP files, we skip hashing because it's too slow (requires downloading the file).
         """
         if source_info.get('is_mtp', False):
             return None
             
         path = source_info.get('path')
-        if not path or not os.path.exists(path):
+        if not path:
             return None
 
-        hash_md5 = hashlib.md5()
         try:
-            with open(path, "rb") as f:
-                while chunk := f.read(chunk_size):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            st = os.stat(path)
+            if cache is not None:
+                cache_key = os.path.normcase(os.path.abspath(path))
+                digest = cache.get(cache_key, st)
+                if digest is not None:
+                    return digest
+            
+            if BLAKE3_AVAILABLE:
+                hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+                hasher.update_mmap(path)
+                digest = hasher.hexdigest()
+            else:
+                hasher = hashlib.blake2b()
+                with open(path, "rb", buffering=0) as f:
+                    try:
+                        # Hash straight from the page cache; empty files can't be mapped
+                        if st.st_size:
+                            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                                hasher.update(mm)
+                    except (OSError, ValueError, OverflowError):
+                        # File system without mmap support, or too large to map on 32-bit
+                        f.seek(0)
+                        hasher = hashlib.blake2b()
+                        if hasattr(hashlib, 'file_digest'):  # Python 3.11+, the read loop runs in C
+                            hasher = hashlib.file_digest(f, 'blake2b')
+                        else:
+                            while chunk := f.read(chunk_size):
+                                hasher.update(chunk)
+                digest = hasher.hexdigest()
+            
+            if cache is not None:
+                cache.put(cache_key, st, digest)
+            return digest
+        except FileNotFoundError:
+            return None
         except Exception as e:
             print(f"Error calculating hash for {path}: {e}")
             return None
     
     @staticmethod
     def is_duplicate(source_file_info, destination_path_base):
-        source_path_or_id = source_file_info['path']
+        verdict, destination_file = FileDeduplicator._check_without_hashing(source_file_info, destination_path_base)
+        if verdict is None:
+            return FileDeduplicator.hashes_match(source_file_info, destination_file)
+        return verdict
+    
+    @staticmethod
+    def _build_size_index(destination_path_base):
+        """Walk the backup folders of the destination once, returns {size: {normcased path: mtime}}"""
+        size_index = {}
+        # Only the Photos_YYYY / Raw_YYYY / Videos_YYYY trees can hold duplicates,
+        # anything else kept on the destination drive is not walked
+        type_prefixes = tuple({prefix + '_' for prefix in FileDeduplicator.FOLDER_PREFIX.values()})
+        stack = []
+        try:
+            with os.scandir(destination_path_base) as entries:
+                for entry in entries:
+                    if entry.name.startswith(type_prefixes) and entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+        except OSError:
+            return size_index
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            size_index.setdefault(st.st_size, {})[os.path.normcase(entry.path)] = st.st_mtime
+                    except OSError:
+                        continue
+        return size_index
+    
+    @staticmethod
+    def _check_without_hashing(source_file_info, destination_path_base, size_index=None):
+        """Cheap duplicate checks (type, path, size, date).
+        With a size_index from _build_size_index no file system calls are made.
+        Returns (True/False, destination_file) when decided, or (None, destination_file)
+        when only comparing hashes can tell."""
         source_size = source_file_info['size']
         
         # CRITICAL: Skip duplicate checking for unknown file types
         # Unknown files will be skipped during backup anyway
         # But allow camera files to be checked (they'll be processed)
         if source_file_info['type'] == 'unknown':
-            return False  # Never consider unknown files as duplicates
+            return False, None  # Never consider unknown files as duplicates
         elif source_file_info['type'] == 'camera':
             # Camera files should be processed, but use 'photo' for duplicate checking temporarily
             # since the actual type will be determined during copy
-            return False  # Don't check duplicates for camera files - let them be processed
+            return False, None  # Don't check duplicates for camera files - let them be processed
         
         creation_date = source_file_info['creation_date']
-        folder_name_suffix = FileDeduplicator.get_folder_name_suffix(source_file_info['type'], creation_date)
+        prefix = FileDeduplicator.FOLDER_PREFIX[source_file_info['type']]
         
         # Construct the full potential destination path
         # This assumes the backup worker uses a similar logic to build the final path.
         # For robustness, the backup worker should ideally create the year/month/day subfolders.
-        # Here, we construct it for checking.
-        year_str = creation_date.strftime('%Y')
-        month_str = creation_date.strftime('%m')
-        day_str = creation_date.strftime('%d')
-        
-        # Base folder for type (Photos_YYYY, Videos_YYYY etc.)
-        type_folder_base = folder_name_suffix.split('_')[0] + "_" + year_str 
-        
-        destination_dir = os.path.join(destination_path_base, type_folder_base, month_str, day_str)
+        # Here, we construct it for checking (Photos_YYYY/MM/DD, Videos_YYYY/MM/DD etc.)
+        y, m, d = creation_date.year, creation_date.month, creation_date.day
+        destination_dir = os.path.join(destination_path_base, f"{prefix}_{y:04d}", f"{m:02d}", f"{d:02d}")
         destination_file = os.path.join(destination_dir, source_file_info['name'])
         
-        if not os.path.exists(destination_file):
-            return False
-        
         try:
-            dest_size = os.path.getsize(destination_file)
-            if source_size != dest_size:
-                return False
+            if size_index is not None:
+                # Nothing of this size at this path in the destination - new file, no hashing
+                dest_mtime_ts = size_index.get(source_size, {}).get(os.path.normcase(destination_file))
+                if dest_mtime_ts is None:
+                    return False, destination_file
+            else:
+                if not os.path.exists(destination_file):
+                    return False, destination_file
+                
+                dest_size = os.path.getsize(destination_file)
+                if source_size != dest_size:
+                    return False, destination_file
+                dest_mtime_ts = None
             
             # For MTP files, size match + date match is sufficient deduplication
             # to avoid the massive performance hit of downloading for MD5.
             if source_file_info.get('is_mtp', False):
                 try:
-                    dest_mtime = datetime.fromtimestamp(os.path.getmtime(destination_file))
+                    if dest_mtime_ts is None:
+                        dest_mtime_ts = os.path.getmtime(destination_file)
+                    dest_mtime = datetime.fromtimestamp(dest_mtime_ts)
                     # Allow 2 second difference for filesystem precision issues
                     if abs((creation_date - dest_mtime).total_seconds()) < 2:
-                        return True
+                        return True, destination_file
                 except:
                     pass
-                return False # If we can't verify date, assume not duplicate to be safe
+                return False, destination_file # If we can't verify date, assume not duplicate to be safe
                 
             # For regular files, we use hashes for 100% certainty
-            source_hash = FileDeduplicator.get_file_hash(source_file_info) 
+            return None, destination_file
+            
+        except Exception as e:
+            print(f"Error checking duplicate for {source_file_info.get('name', 'N/A')}: {e}")
+            return False, destination_file
+    
+    @staticmethod
+    def hashes_match(source_file_info, destination_file, cache=None):
+        """Compare the source and destination contents by hash"""
+        try:
+            source_hash = FileDeduplicator.get_file_hash(source_file_info, cache=cache) 
             dest_hash_info = {'path': destination_file, 'is_mtp': False}
-            dest_hash = FileDeduplicator.get_file_hash(dest_hash_info)
+            dest_hash = FileDeduplicator.get_file_hash(dest_hash_info, cache=cache)
             
             return source_hash == dest_hash and source_hash is not None
             
@@ -647,8 +813,39 @@ class FileDeduplicator:
         
         # This part is called by BackupWorker before starting the copy.
         # The files_list here is the full list from the scanner.
+        # Decide what the cheap checks can first, then hash the remaining
+        # candidates in parallel - hashing is I/O bound on two different drives
+        # The size index is built fresh per call, so files written by the previous
+        # backup are always included
+        size_index = FileDeduplicator._build_size_index(destination_base)
+        verdicts = []
+        candidates = []
         for file_info in files_list:
-            if FileDeduplicator.is_duplicate(file_info, destination_base):
+            verdict, destination_file = FileDeduplicator._check_without_hashing(file_info, destination_base, size_index)
+            if verdict is None:
+                candidates.append((len(verdicts), file_info, destination_file))
+            verdicts.append(verdict)
+        
+        if candidates:
+            try:
+                cache = HashCache(destination_base)
+            except sqlite3.Error as e:
+                # Read-only or unusual destination - hash everything as before
+                print(f"Hash cache unavailable for {destination_base}: {e}")
+                cache = None
+            
+            try:
+                max_workers = min(8, (os.cpu_count() or 1) * 2)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    matches = executor.map(lambda c: FileDeduplicator.hashes_match(c[1], c[2], cache), candidates)
+                    for (index, _, _), match in zip(candidates, matches):
+                        verdicts[index] = match
+            finally:
+                if cache is not None:
+                    cache.close()
+        
+        for file_info, verdict in zip(files_list, verdicts):
+            if verdict:
                 duplicates.append(file_info)
             else:
                 new_files.append(file_info)
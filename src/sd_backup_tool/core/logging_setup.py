@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Logging setup
+One place that configures the module loggers from the SDBACKUP_LOGLEVEL environment variable.
+"""
+
+import logging
+import os
+
+# Per-item detail is logged at DEBUG so it costs nothing by default;
+# set SDBACKUP_LOGLEVEL=DEBUG to see it
+LOG_LEVEL_ENV = 'SDBACKUP_LOGLEVEL'
+DEFAULT_LOG_LEVEL = 'WARNING'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s - %(message)s'
+
+def configure_logger(name):
+    """Return the named logger with the configured level and a console handler attached once"""
+    logger = logging.getLogger(name)
+    level = logging.getLevelName(os.environ.get(LOG_LEVEL_ENV, DEFAULT_LOG_LEVEL).upper())
+    logger.setLevel(level if isinstance(level, int) else logging.WARNING)
+
+    # Loggers are shared (e.g. by every worker), so only attach the handler once
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+    return logger
@@ -14,19 +14,45 @@ import win32api
 import win32con
 import subprocess
 import re
+from .logging_setup import configure_logger
+
+# Per-drive/per-item detail is logged at DEBUG; set SDBACKUP_LOGLEVEL=DEBUG to see it
+logger = configure_logger(__name__)
 
 try:
+    import pythoncom
+    import pywintypes
     import win32com.client
     COM_AVAILABLE = True
 except ImportError:
     COM_AVAILABLE = False
-    print("WARNING: win32com not available - MTP detection disabled")
+    logger.warning("win32com not available - MTP detection disabled")
+
+# Device arrival/removal notifications (drive letters and MTP phones alike). An extrinsic
+# event, so WMI doesn't have to poll for it the way WITHIN queries do.
+DEVICE_EVENT_QUERY = "SELECT * FROM Win32_DeviceChangeEvent"
+WBEM_E_TIMED_OUT = -2147209215  # 0x80043001, NextEvent timed out without an event
+EVENT_WAIT_MS = 1000            # How often the event loop checks self.running
+EVENT_SETTLE_MS = 500           # One plug-in raises several events, wait for them to stop
+FALLBACK_CHECK_INTERVAL = 30    # Seconds between safety re-checks without any event
+# Plugged-in Windows Portable Devices (phones, cameras in MTP/PTP mode)
+PORTABLE_DEVICE_QUERY = "SELECT DeviceID FROM Win32_PnPEntity WHERE PNPClass = 'WPD'"
+
+# Top-level folders that camera/phone media leaves on a card (compared upper-case)
+_MEDIA_FOLDERS = frozenset({'DCIM', 'PRIVATE', 'GOPRO', 'AVCHD', 'DOWNLOAD', 'PICTURES'})
+
+# Keyword matchers, one regex search per item instead of a Python loop over keywords
+_PORTABLE_TYPE_RE = re.compile(r'PORTABLE|MTP|MEDIA|手機|行動裝置', re.I)
+_SD_LABEL_RE = re.compile(r'SD|CANON|SONY|NIKON|DJI|GOPRO|EOS', re.I)
+_MTP_PATH_RE = re.compile(r'MTP|PORTABLE|USB', re.I)
+_USB_VID_PID_RE = re.compile(r'usb#vid_.*&pid_', re.I)
 
 class SDCardDetector(QThread):
     """Improved SD card detector running on background thread"""
     
     sd_card_detected = pyqtSignal(dict)  # Emits dict: {'id': str, 'name': str, 'type': str, 'path': str}
     sd_card_removed = pyqtSignal(str)    # Emits the ID of the removed device
+    sd_cards_changed = pyqtSignal(list, list)  # All changes of one check: (added info dicts, removed IDs)
     
     def __init__(self):
         super().__init__()
@@ -34,25 +60,125 @@ class SDCardDetector(QThread):
         self.current_sd_drives = set()
         # QTimer removal: Self-contained thread loop
         self.last_drives = set()
-        self.scan_cache = {}  # Cache scan results
+        self.drives_info = {}  # {device id: info dict} from the last check_drives
+        self.scan_cache = {}  # {fixed drive: (volume serial, is SD card)} from _is_potential_sd_card
+        self._last_usage = {}  # {drive: disk_usage()} read while classifying, used once by check_drives
         self.selected_source_device = None  # Track selected source
         self.selected_destination_drive = None  # Track selected destination
         self.smart_scanning_enabled = False  # Switch to smart mode after initial setup
+        self._check_requested = threading.Event()  # Set by request_check() to re-check soon
+        # Shell.Application and the Computer folder, created once on the detector thread
+        self._shell = None
+        self._computer_ns = None
+        self._wmi = None  # WMI root\cimv2 services, for the portable device query
+        # Bumped on every device event/requested check; the shell namespace walk for
+        # MTP devices only runs again when it has moved since the last walk
+        self._device_generation = 0
+        self._mtp_generation = None
+        self._mtp_cache = {}  # {device_id: drives_info entry} from the last walk
+        self._last_fingerprint = None  # (drive letter bitmask, device generation) of the last full check
     
     def run(self):
-        """Main thread loop"""
+        """Main thread loop - re-checks drives when Windows reports a device change"""
         self.running = True
-        print("SD Card Detector thread started")
-        while self.running:
+        logger.info("SD Card Detector thread started")
+        # Empty card readers fail probes quietly instead of stalling on a "no disk" dialog
+        win32api.SetErrorMode(win32con.SEM_FAILCRITICALERRORS | win32con.SEM_NOOPENFILEERRORBOX)
+        if COM_AVAILABLE:
+            # Everything COM on this thread (shell objects, WMI events) lives in this apartment
+            pythoncom.CoInitializeEx(pythoncom.COINIT_APARTMENTTHREADED)
+        try:
+            if COM_AVAILABLE:
+                try:
+                    self._get_computer_namespace()  # Create the shell objects once, up front
+                except Exception as e:
+                    logger.warning("Could not create Shell.Application: %s", e)
             self.check_drives()
-            # Sleep for 1 second between checks
-            for _ in range(10): 
-                if not self.running: break
-                time.sleep(0.1)
+            watcher = self._open_device_watcher()
+            last_check = time.monotonic()
+            while self.running:
+                if watcher is not None:
+                    changed = self._wait_for_device_event(watcher, EVENT_WAIT_MS)
+                    if changed is None:
+                        # WMI failed - fall back to polling
+                        watcher = None
+                        continue
+                    if changed:
+                        while self.running and self._wait_for_device_event(watcher, EVENT_SETTLE_MS):
+                            pass
+                else:
+                    # No event source: poll once a second as before
+                    self._check_requested.wait(1.0)
+                    changed = True
+                
+                if not self.running:
+                    break
+                requested = self._check_requested.is_set()
+                if changed or requested or time.monotonic() - last_check >= FALLBACK_CHECK_INTERVAL:
+                    # The safety re-check bumps the generation too, otherwise the unchanged
+                    # fingerprint would skip it and a missed event (e.g. a card swapped in a
+                    # fixed-letter reader) would never be picked up
+                    self._device_generation += 1
+                    self._check_requested.clear()
+                    self.check_drives()
+                    last_check = time.monotonic()
+        finally:
+            self._shell = None
+            self._computer_ns = None
+            self._wmi = None
+            if COM_AVAILABLE:
+                pythoncom.CoUninitialize()
+    
+    def _get_computer_namespace(self):
+        """Cached Computer (CSIDL_DRIVES) shell folder"""
+        if self._computer_ns is None:
+            if self._shell is None:
+                self._shell = win32com.client.Dispatch("Shell.Application")
+            self._computer_ns = self._shell.NameSpace(17)  # Computer namespace
+        return self._computer_ns
+    
+    def _count_portable_devices(self):
+        """Number of plugged-in portable (WPD) devices, None if WMI can't be asked"""
+        try:
+            if self._wmi is None:
+                self._wmi = win32com.client.GetObject("winmgmts:\\\\.\\root\\cimv2")
+            return self._wmi.ExecQuery(PORTABLE_DEVICE_QUERY).Count
+        except Exception as e:
+            logger.debug("Portable device query failed: %s", e)
+            self._wmi = None
+            return None
+    
+    def request_check(self):
+        """Ask the detector thread to re-check drives on its next wake-up"""
+        self._check_requested.set()
+    
+    def _open_device_watcher(self):
+        """Subscribe to device change events, returns the event source or None"""
+        if not COM_AVAILABLE:
+            return None
+        try:
+            wmi = win32com.client.GetObject("winmgmts:")
+            return wmi.ExecNotificationQuery(DEVICE_EVENT_QUERY)
+        except Exception as e:
+            logger.info("Device change events unavailable, polling instead: %s", e)
+            return None
+    
+    def _wait_for_device_event(self, watcher, timeout_ms):
+        """True if a device event arrived, False on timeout, None if the watcher failed"""
+        try:
+            watcher.NextEvent(timeout_ms)
+            return True
+        except pywintypes.com_error as e:
+            excepinfo = e.excepinfo or ()
+            if e.hresult == WBEM_E_TIMED_OUT or (len(excepinfo) > 5 and excepinfo[5] == WBEM_E_TIMED_OUT):
+                return False
+            logger.warning("Device change event wait failed: %s", e)
+            return None
                 
     def stop(self):
         """Stop monitoring SD cards"""
         self.running = False
+        self._check_requested.set()  # Wake the polling fallback
         self.wait()  # Wait for thread to finish
     
     def _is_potential_sd_card(self, drive):
@@ -64,132 +190,153 @@ class SDCardDetector(QThread):
 
             drive_type = win32file.GetDriveType(drive)
             
-            # Get drive info
-            try:
-                total, used, free = shutil.disk_usage(drive)
-                total_gb = total / (1024**3)
-            except:
-                return False
-
-            # SD cards are typically 2GB to 2TB
-            if total_gb < 1 or total_gb > 2048:
-                return False
-
-            # Case 1: Standard Removable Drive
+            # Case 1: Standard Removable Drive - the size is all there is to check
             if drive_type == win32file.DRIVE_REMOVABLE:
-                return True
+                return self._has_sd_card_size(drive)
             
             # Case 2: Fixed Drive that looks like an SD card (Large cards with high-speed readers)
-            if drive_type == win32file.DRIVE_FIXED:
-                # Check for characteristic media folders
-                media_folders = ['DCIM', 'PRIVATE', 'GOPRO', 'AVCHD', 'DOWNLOAD', 'PICTURES']
-                for folder in media_folders:
-                    if os.path.exists(os.path.join(drive, folder)):
-                        print(f"Drive {drive} detected as SD card because of folder: {folder}")
-                        return True
-                
-                # Check volume label
-                try:
-                    volume_info = win32file.GetVolumeInformation(drive)
-                    label = volume_info[0].upper()
-                    if any(x in label for x in ["SD", "CANON", "SONY", "NIKON", "DJI", "GOPRO", "EOS"]):
-                        print(f"Drive {drive} detected as SD card by label: {label}")
-                        return True
-                except:
-                    pass
-                    
-            return False
+            if drive_type != win32file.DRIVE_FIXED:
+                return False
+            
+            # Looking at a fixed drive's folders is the slow part, cache it per volume serial number
+            try:
+                volume_info = win32api.GetVolumeInformation(drive)
+            except Exception:
+                self.scan_cache.pop(drive, None)
+                return False
+            serial = volume_info[1]
+            cached = self.scan_cache.get(drive)
+            if cached is not None and cached[0] == serial:
+                return cached[1]
+            
+            verdict = self._has_sd_card_size(drive) and self._looks_like_sd_card(drive, volume_info[0])
+            self.scan_cache[drive] = (serial, verdict)
+            return verdict
         except Exception as e:
-            print(f"Error checking if drive is SD card: {e}")
+            logger.error("Error checking if drive is SD card: %s", e)
+            return False
+
+    def _has_sd_card_size(self, drive):
+        """True if the drive's capacity is in the SD card range"""
+        # A drive without media (e.g. an empty card reader slot) fails here
+        try:
+            usage = shutil.disk_usage(drive)
+        except OSError:
             return False
+        self._last_usage[drive] = usage
+        total_gb = usage.total / (1024**3)
+        
+        # SD cards are typically 2GB to 2TB
+        return 1 <= total_gb <= 2048
+
+    def _looks_like_sd_card(self, drive, label):
+        """Check a fixed drive for camera media folders or a camera/SD volume label"""
+        # Check for characteristic media folders
+        # One directory listing instead of an exists() call per folder
+        try:
+            with os.scandir(drive) as it:
+                names = {e.name.upper() for e in it if e.is_dir(follow_symlinks=False)}
+            found = names & _MEDIA_FOLDERS
+            if found:
+                logger.debug("Drive %s detected as SD card because of folder: %s", drive, min(found))
+                return True
+        except OSError:
+            pass
+        
+        # Check volume label
+        if _SD_LABEL_RE.search(label):
+            logger.debug("Drive %s detected as SD card by label: %s", drive, label)
+            return True
+        return False
 
     def check_drives(self):
         """Check for connected drives and emit signals for changes"""
         try:
-            print("Starting drive detection...")
+            # Same drive letters and no device event since the last full check: nothing moved
+            mask = win32api.GetLogicalDrives()
+            fingerprint = (mask, self._device_generation)
+            if fingerprint == self._last_fingerprint:
+                logger.debug("No drive or device change, skipping detection")
+                return
+            
+            logger.debug("Starting drive detection...")
             current_drives = set()
             drives_info = {}
             
             # First check for MTP devices
-            print("Checking for MTP devices using Windows COM...")
-            if COM_AVAILABLE:
+            if COM_AVAILABLE and self._mtp_generation == self._device_generation:
+                # No device change since the last walk, it can't find anything new
+                logger.debug("No device change, reusing MTP devices: %s", list(self._mtp_cache))
+                current_drives.update(self._mtp_cache)
+                drives_info.update(self._mtp_cache)
+            elif COM_AVAILABLE and self._count_portable_devices() == 0:
+                # One WMI query says no phone/camera is plugged in, the shell walk can't find one
+                logger.debug("No portable devices, skipping the MTP walk")
+                self._mtp_cache = {}
+                self._mtp_generation = self._device_generation
+            elif COM_AVAILABLE:
+                logger.debug("Checking for MTP devices using Windows COM...")
                 try:
-                    shell = win32com.client.Dispatch("Shell.Application")
-                    computer = shell.NameSpace(17)  # Computer namespace
+                    computer = self._get_computer_namespace()
                     
                     if not computer:
-                        print("Failed to get computer namespace")
+                        logger.warning("Failed to get computer namespace")
+                        self._computer_ns = None
                         return
                         
-                    print("Successfully got computer namespace")
                     items = computer.Items()
-                    print(f"Found {len(items)} items in computer namespace:")
-                    for idx, itm in enumerate(items):
-                        try:
-                            print(f"  {idx}: Name='{itm.Name}', Path='{itm.Path}'")
-                        except: pass
                     
                     for item in items:
                         try:
-                            item_name = str(item.Name) if item.Name else ""
-                            item_path = str(item.Path) if item.Path else ""
-                            item_type = ""
+                            # Each property read is a COM call, read them once
+                            item_name = str(item.Name or "")
+                            item_path = str(item.Path or "")
                             try:
-                                item_type = str(item.Type) if hasattr(item, 'Type') else ""
-                            except: pass
+                                item_type = str(item.Type or "")
+                            except (AttributeError, pywintypes.com_error):
+                                item_type = ""
                             
-                            print(f"Checking item - Name: '{item_name}', Type: '{item_type}', Path: '{item_path}'")
+                            logger.debug("Checking item - Name: '%s', Type: '%s', Path: '%s'", item_name, item_type, item_path)
                             
                             # Check if this is a portable device
                             is_portable = False
                             
                             # Method 1: Check Type property for common indicators
-                            if any(x in item_type.upper() for x in ["PORTABLE", "MTP", "MEDIA", "手機", "行動裝置"]):
+                            if _PORTABLE_TYPE_RE.search(item_type):
                                 is_portable = True
-                                print(f"Found portable device by Type indicator: {item_type}")
+                                logger.debug("Found portable device by Type indicator: %s", item_type)
                             
                             # Method 2: Check path for MTP or Portable indicators
                             if not is_portable:
                                 if "::" in item_path:
                                     # If it has the GUID prefix, it's very likely a shell namespace device (MTP/Network/etc)
                                     is_portable = True
-                                    print(f"Found shell namespace item (potential MTP): {item_path}")
-                                elif "usb#vid_" in item_path.lower() and "&pid_" in item_path.lower():
+                                    logger.debug("Found shell namespace item (potential MTP): %s", item_path)
+                                elif _USB_VID_PID_RE.search(item_path):
                                     is_portable = True
-                                    print(f"Found MTP device with USB VID/PID in path")
+                                    logger.debug("Found MTP device with USB VID/PID in path")
                             
                             # Method 3: Check if it's a folder but NOT a standard drive letter
                             if not is_portable:
-                                try:
-                                    folder = item.GetFolder
-                                    if folder:
-                                        # If it's not a standard drive (e.g. "C:\") it might be an MTP device
-                                        # Regular drives are handled separately
-                                        if len(item_path) >= 2 and item_path[1:3] == ":\\":
-                                            print(f"Skipping regular drive: {item_name} ({item_path})")
-                                            continue
-                                            
+                                # Regular drives (e.g. "C:\") are handled separately - decide that
+                                # from the path before asking the device for its folder
+                                if len(item_path) >= 2 and item_path[1:3] == ":\\":
+                                    logger.debug("Skipping regular drive: %s (%s)", item_name, item_path)
+                                    continue
+                                # Only ask the device whether it's a folder when the name/path
+                                # would make it a portable device
+                                empty_path = not item_path and item_name
+                                if (empty_path or _MTP_PATH_RE.search(item_path)) and item.IsFolder:
+                                    if empty_path:
                                         # If path is empty but name exists and it's a folder, it's likely a portable device
-                                        if not item_path and item_name:
-                                            is_portable = True
-                                            print(f"Found potential portable device with empty path: {item_name}")
-                                        elif any(x in item_path.upper() for x in ["MTP", "PORTABLE", "USB"]):
-                                            is_portable = True
-                                            print(f"Found portable device by path keyword: {item_path}")
-                                except Exception as e:
-                                    pass
+                                        is_portable = True
+                                        logger.debug("Found potential portable device with empty path: %s", item_name)
+                                    else:
+                                        is_portable = True
+                                        logger.debug("Found portable device by path keyword: %s", item_path)
                             
                             if is_portable and item_name:
-                                # Final check: Ensure it has some content or is a folder
-                                try:
-                                    folder = item.GetFolder
-                                    # Even if we don't explore deeper here, the presence of GetFolder 
-                                    # for a portable device is a good sign.
-                                except:
-                                    print(f"Item {item_name} reported as portable but has no folder access")
-                                    # Don't skip yet, older phones might behave differently
-                                
-                                print(f"Found portable device: {item_name}")
+                                logger.debug("Found portable device: %s", item_name)
                                 device_id = f"MTP:{item_name}"
                                 current_drives.add(device_id)
                                 drives_info[device_id] = {
@@ -201,92 +348,108 @@ class SDCardDetector(QThread):
                                     'is_mtp': True,
                                     'com_item': item
                                 }
-                                print(f"Added MTP device to list: {device_id}")
+                                logger.debug("Added MTP device to list: %s", device_id)
                             
                         except Exception as e:
-                            print(f"Error checking MTP device: {e}")
+                            logger.error("Error checking MTP device: %s", e)
                             continue
+                    
+                    self._mtp_cache = dict(drives_info)
+                    self._mtp_generation = self._device_generation
                 except Exception as e:
-                    print(f"Error checking MTP devices: {e}")
-                    import traceback
-                    print(f"Traceback: {traceback.format_exc()}")
+                    logger.error("Error checking MTP devices: %s", e)
+                    # Recreate the shell objects next time in case they went stale
+                    self._shell = None
+                    self._computer_ns = None
+                    logger.debug("Traceback", exc_info=True)
             else:
-                print("COM not available - MTP detection disabled")
+                logger.debug("COM not available - MTP detection disabled")
             
             # Check for SD cards (Mass Storage) even if MTP devices detected
             # This allows supporting devices that might appear as both or user having multiple devices
             
-            # Get all drives
-            drives = [f"{d}:\\" for d in "ABCDEFGHIJKLMNOPQRSTUVWXYZ" if os.path.exists(f"{d}:")]
-            print(f"Found drives: {drives}")
+            # Get all drives - one bitmask call instead of probing every letter
+            drives = [f"{chr(ord('A') + i)}:\\" for i in range(26) if mask & (1 << i)]
+            logger.debug("Found drives: %s", drives)
+            
+            # Forget classifications of drives that are gone
+            for cached_drive in self.scan_cache.keys() - set(drives):
+                del self.scan_cache[cached_drive]
             
             # Check each drive
+            self._last_usage.clear()
             for drive in drives:
                 try:
-                    print(f"Checking drive {drive}")
+                    logger.debug("Checking drive %s", drive)
                     if self._is_potential_sd_card(drive):
-                        total, used, free = shutil.disk_usage(drive)
-                        print(f"Drive {drive} - Total: {total}, Used: {used}, Free: {free}")
+                        # Reuse the figures from classifying the drive this pass, if it was classified
+                        usage = self._last_usage.pop(drive, None) or shutil.disk_usage(drive)
+                        total, used, free = usage
+                        logger.debug("Drive %s - Total: %s, Used: %s, Free: %s", drive, total, used, free)
                         
                         # Convert to GB for display
                         total_gb = total / (1024**3)
                         used_gb = used / (1024**3)
                         free_gb = free / (1024**3)
                         
-                        print(f"Added drive {drive} to list (Free space: {free_gb:.1f}GB)")
+                        logger.debug("Added drive %s to list (Free space: %.1fGB)", drive, free_gb)
                         current_drives.add(drive)
-                        drives_info[drive] = {
-                            'id': drive,
-                            'drive': drive,
-                            'name': '',
-                            'type': 'SD',
-                            'path': drive,
-                            'total_gb': total_gb,
-                            'free_gb': free_gb,
-                            'used_gb': used_gb
-                        }
+                        # Keep the entry from the last check, only the space figures change
+                        info = self.drives_info.get(drive)
+                        if info is None or info.get('type') != 'SD':
+                            info = {
+                                'id': drive,
+                                'drive': drive,
+                                'name': '',
+                                'type': 'SD',
+                                'path': drive,
+                            }
+                        info['total_gb'] = total_gb
+                        info['free_gb'] = free_gb
+                        info['used_gb'] = used_gb
+                        drives_info[drive] = info
                     else:
-                        print(f"Drive {drive} is not a potential SD card")
+                        logger.debug("Drive %s is not a potential SD card", drive)
                 except Exception as e:
-                    print(f"Error checking drive {drive}: {e}")
+                    logger.error("Error checking drive %s: %s", drive, e)
             
-            print(f"Final drives_info: {drives_info}")
+            logger.debug("Final drives_info: %s", drives_info)
             
-            # Emit signals for changes
-            for drive in current_drives - self.current_sd_drives:
-                print(f"New device detected: {drive}")
-                self.sd_card_detected.emit(drives_info[drive])
+            self.drives_info = drives_info
+            self._last_fingerprint = fingerprint
+            if current_drives == self.current_sd_drives:
+                # Same devices as last time, nothing to tell the UI
+                return
             
-            for drive in self.current_sd_drives - current_drives:
-                print(f"Device removed: {drive}")
-                self.sd_card_removed.emit(drive)
+            # Sorted so the order of a batch is stable (drive letters, then MTP IDs)
+            added = [drives_info[drive] for drive in sorted(current_drives - self.current_sd_drives)]
+            removed = sorted(self.current_sd_drives - current_drives)
             
+            # Update state before emitting so handlers see the new device list
             self.current_sd_drives = current_drives
-            self.drives_info = drives_info
+            
+            # Emit signals for changes
+            for info in added:
+                logger.info("New device detected: %s", info['id'])
+                self.sd_card_detected.emit(info)
+            for drive in removed:
+                logger.info("Device removed: %s", drive)
+                self.sd_card_removed.emit(drive)
+            self.sd_cards_changed.emit(added, removed)
             
         except Exception as e:
-            print(f"Error in check_drives: {e}")
-            import traceback
-            print(f"Traceback: {traceback.format_exc()}")
+            logger.error("Error in check_drives: %s", e)
+            logger.debug("Traceback", exc_info=True)
     
     def _is_device_still_connected(self, device_id):
         """Quick check if a specific device is still connected"""
         try:
             if device_id.startswith("MTP"):
-                # Quick COM check for MTP devices
-                if COM_AVAILABLE:
-                    try:
-                        shell = win32com.client.Dispatch("Shell.Application")
-                        computer = shell.NameSpace(17)
-                        for item in computer.Items():
-                            if item.Name and (not item.Path or "::" in item.Path):
-                                return True  # At least one MTP device found
-                    except:
-                        pass
-                return False
+                # check_drives keeps this set current on every device change event
+                return device_id in self.current_sd_drives
             else:
                 # Quick filesystem drive check
                 return os.path.exists(device_id)
         except Exception as e:
-            print(f"Error checking device connection for {device_id}: {e}")
+            logger.error("Error checking device connection for %s: %s", device_id, e)
             return False
\ No newline at end of file
@@ -20,15 +20,22 @@ class LanguageManager:
     def __init__(self):
         """Initialize language manager"""
         self.current_lang = DEFAULT_LANG
-        self.texts = LANGUAGES[self.current_lang]
+        self._load_texts(LANGUAGES[self.current_lang])
+    
+    def _load_texts(self, texts):
+        """Use texts and split out the ones that need no formatting"""
+        self.texts = texts
+        self._plain = {k: v for k, v in texts.items() if '{' not in v}
     
     def get_text(self, key, *args, **kwargs):
         """Get text for the given key with optional formatting"""
+        if not args and not kwargs:
+            text = self._plain.get(key)
+            if text is not None:
+                return text
+            return self.texts.get(key, key)
         try:
-            text = self.texts.get(key, key)
-            if args or kwargs:
-                return text.format(*args, **kwargs)
-            return text
+            return self.texts.get(key, key).format(*args, **kwargs)
         except Exception as e:
             print(f"Error formatting text for key '{key}': {e}")
             return key
@@ -37,7 +44,7 @@ class LanguageManager:
         """Set current language"""
         if lang_code in LANGUAGES:
             self.current_lang = lang_code
-            self.texts = LANGUAGES[lang_code]
+            self._load_texts(LANGUAGES[lang_code])
             return True
         return False
     
@@ -5,6 +5,9 @@ Each translation includes an English comment for reference
 To change the language, modify the text after the colon (:) in each line
 """
 
+import sys
+import types
+
 UI_TEXT = {
     # Main window
     'window_title': '相片影片備份工具',  # Photo & Video Backup Tool (Updated comment)
@@ -130,4 +133,7 @@ UI_TEXT = {
     'mtp_can_disconnect_message': '{} 的備份已完成。\n您現在可以安全地中斷裝置連線。',
     'can_remove_device_message': '您現在可以安全地移除 {}。',
     'eject_failed_message': '無法自動退出 {}。\n請手動移除。\n錯誤: {}',
-}
\ No newline at end of file
+}
+
+# Read-only at runtime; keys interned so lookups can match by identity
+UI_TEXT = types.MappingProxyType({sys.intern(k): v for k, v in UI_TEXT.items()})
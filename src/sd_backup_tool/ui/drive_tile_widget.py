@@ -4,143 +4,210 @@ Drive tile widget module
 Provides a visual drive selection interface
 """
 
-import os
-import win32api
-import win32file
-import shutil
+import logging
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QFrame, QScrollArea, QGridLayout
+    QPushButton, QFrame, QScrollArea, QLayout
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QSize
+from PyQt5.QtCore import Qt, pyqtSignal, QSize, QTimer, QRect
 from PyQt5.QtGui import QFont, QIcon, QColor
 from ..locales import LanguageManager
 
+logger = logging.getLogger(__name__)
+
+# Tile colors, picked per drive by a hash of the drive letter
+TILE_COLORS = ['#e8f6f3', '#ebf5fb', '#fef9e7', '#f4ecf7']
+TILE_BORDER_COLORS = ['#1abc9c', '#3498db', '#f1c40f', '#9b59b6']
+TILE_TEXT_COLORS = ['#16a085', '#2980b9', '#d35400', '#8e44ad']
+
+# Tile look per color index; tiles pick theirs through the colorIdx/selectedState properties
+TILE_STYLE = """
+    QFrame[colorIdx="{index}"] {{
+        background-color: {background};
+        border: none;
+        border-radius: 10px;
+    }}
+    QFrame[colorIdx="{index}"]:hover {{
+        border: 2px solid #34495e;
+    }}
+    QFrame[colorIdx="{index}"][selectedState="1"] {{
+        border: 4px solid #2ecc71;
+    }}
+    QFrame[colorIdx="{index}"] QLabel {{
+        color: {text};
+        border: none;
+    }}
+"""
+
+# One stylesheet for all tiles, installed once on the tile container
+TILES_STYLESHEET = "".join(
+    TILE_STYLE.format(index=i, background=TILE_COLORS[i], text=TILE_TEXT_COLORS[i])
+    for i in range(len(TILE_COLORS))
+)
+
+def color_index(drive):
+    """Consistent tile color index from a hash of the drive letter"""
+    # Use abs(hash()) of the drive letter (e.g. "C:\") to get a consistent positive integer
+    return abs(hash(drive)) % len(TILE_COLORS)
+
 class DriveTile(QFrame):
     """Drive tile class"""
     
-    def __init__(self, drive_info, drives_info, parent=None):
+    clicked = pyqtSignal(str)  # Emits the tile's drive
+    
+    _TILE_FONT = None  # Shared by the labels of every tile, created with the first one
+    
+    def __init__(self, drive_info, drives_info, parent=None, free_space_text=None):
         super().__init__(parent)
         self.drive_info = drive_info
         self.drives_info = drives_info
-        self.lang = LanguageManager()
+        # Unformatted 'free_space' text, normally looked up once by DriveSelectionWidget
+        self.free_space_text = free_space_text or LanguageManager().get_text('free_space')
         
-        # Set colors based on drive letter hash to ensure stability
-        # Use simple hash of the drive letter (e.g. "C:\") to pick a consistent color index
-        colors = ['#e8f6f3', '#ebf5fb', '#fef9e7', '#f4ecf7']
-        border_colors = ['#1abc9c', '#3498db', '#f1c40f', '#9b59b6']
-        text_colors = ['#16a085', '#2980b9', '#d35400', '#8e44ad']
+        # Set colors based on drive letter hash to ensure stability,
+        # update_drives has normally worked out the index already
+        self._index = drive_info.get('_color_index')
+        if self._index is None:
+            self._index = color_index(drive_info['drive'])
         
-        # Use abs(hash()) to get consistent positive integer
-        drive_hash = abs(hash(self.drive_info['drive']))
-        index = drive_hash % len(colors)
+        self.background_color = TILE_COLORS[self._index]
+        self.border_color = TILE_BORDER_COLORS[self._index]
+        self.text_color = TILE_TEXT_COLORS[self._index]
         
-        self.background_color = colors[index % len(colors)]
-        self.border_color = border_colors[index % len(border_colors)]
-        self.text_color = text_colors[index % len(text_colors)]
+        # Styled by TILES_STYLESHEET on the container, no per-tile stylesheet to parse
+        self.setProperty("colorIdx", self._index)
+        self.setProperty("selectedState", 0)
         
         self.init_ui()
-        
-        self.setStyleSheet(f"""
-            QFrame {{
-                background-color: {self.background_color};
-                border: none;
-                border-radius: 10px;
-            }}
-            QFrame:hover {{
-                background-color: {self.background_color};
-                border: 2px solid #34495e;
-            }}
-            QFrame[selected="true"] {{
-                background-color: {self.background_color};
-                border: 4px solid #2ecc71;
-                border-radius: 10px;
-            }}
-            QLabel {{
-                color: {self.text_color};
-                border: none;
-            }}
-        """)
     
     def init_ui(self):
         """Initialize UI to match scanned files tile design - single row layout"""
         self.setFrameShape(QFrame.StyledPanel)
         self.setMinimumHeight(80)  # Match scanned files tile height
         
-        layout = QVBoxLayout(self)
-        layout.setContentsMargins(20, 20, 20, 20)  # Match scanned files padding
-        layout.setSpacing(0)
+        if DriveTile._TILE_FONT is None:
+            DriveTile._TILE_FONT = QFont("Microsoft JhengHei", 20, QFont.Bold)  # Match scanned files font
         
         # Single row with drive letter and free space
-        main_layout = QHBoxLayout()
-        main_layout.setAlignment(Qt.AlignCenter)
-        main_layout.setSpacing(20)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(20, 20, 20, 20)  # Match scanned files padding
+        layout.setAlignment(Qt.AlignCenter)
+        layout.setSpacing(20)
         
         # Drive letter
         self.drive_letter = QLabel(self.drive_info['drive'])
-        self.drive_letter.setFont(QFont("Microsoft JhengHei", 20, QFont.Bold))  # Match scanned files font
-        self.drive_letter.setStyleSheet(f"color: {self.text_color}; border: none;")
+        self.drive_letter.setFont(DriveTile._TILE_FONT)
         self.drive_letter.setAlignment(Qt.AlignCenter)
-        main_layout.addWidget(self.drive_letter)
+        layout.addWidget(self.drive_letter)
         
         # Free space info
-        self.free_label = QLabel(self.lang.get_text('free_space', round(self.drive_info['free_gb'])))
-        self.free_label.setFont(QFont("Microsoft JhengHei", 20, QFont.Bold))
-        self.free_label.setStyleSheet(f"color: {self.text_color}; border: none;")
+        self.free_label = QLabel(self.free_space_text.format(round(self.drive_info['free_gb'])))
+        self.free_label.setFont(DriveTile._TILE_FONT)
         self.free_label.setAlignment(Qt.AlignCenter)
-        main_layout.addWidget(self.free_label)
-        
-        layout.addLayout(main_layout)
+        layout.addWidget(self.free_label)
+    
+    def update_info(self, drive_info, drives_info):
+        """Refresh the tile in place with new info for the same drive"""
+        self.drive_info = drive_info
+        self.drives_info = drives_info
+        self.free_label.setText(self.free_space_text.format(round(drive_info['free_gb'])))
     
     def set_selected(self, selected):
         """Set selected state with clear visual feedback"""
-        self.setProperty("selected", selected)
-        self.style().unpolish(self)
+        self.setProperty("selectedState", 1 if selected else 0)
+        # polish() drops the cached style rules for this tile itself, no unpolish() needed
         self.style().polish(self)
-        
-        if selected:
-            self.setStyleSheet(f"""
-                QFrame {{
-                    background-color: {self.background_color};
-                    border: 4px solid #2ecc71;
-                    border-radius: 10px;
-                }}
-                QFrame:hover {{
-                    background-color: {self.background_color};
-                    border: 4px solid #2ecc71;
-                }}
-                QLabel {{
-                    color: {self.text_color};
-                    border: none;
-                }}
-            """)
-        else:
-            self.setStyleSheet(f"""
-                QFrame {{
-                    background-color: {self.background_color};
-                    border: none;
-                    border-radius: 10px;
-                }}
-                QFrame:hover {{
-                    background-color: {self.background_color};
-                    border: 2px solid #34495e;
-                }}
-                QLabel {{
-                    color: {self.text_color};
-                    border: none;
-                }}
-            """)
+        self.update()
 
     def mousePressEvent(self, event):
         """Handle mouse press event to select the drive"""
         if event.button() == Qt.LeftButton:
-            # Find the DriveSelectionWidget parent
-            widget = self.parent()
-            while widget and not isinstance(widget, DriveSelectionWidget):
-                widget = widget.parent()
-            if widget:
-                widget.on_drive_selected(self.drive_info['drive'])
-            print(f"Drive tile clicked: {self.drive_info['drive']}")
+            self.clicked.emit(self.drive_info['drive'])
+            logger.debug("Drive tile clicked: %s", self.drive_info['drive'])
+
+class TileGridLayout(QLayout):
+    """Grid of equally sized tiles in a fixed number of columns, placed in one pass"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        self._columns = 1
+    
+    def set_columns(self, columns):
+        """Set the number of columns"""
+        if columns != self._columns:
+            self._columns = columns
+            self.invalidate()
+    
+    def set_order(self, widgets):
+        """Order the tiles like widgets, without taking them out of the layout"""
+        position = {widget: idx for idx, widget in enumerate(widgets)}
+        self._items.sort(key=lambda item: position.get(item.widget(), len(position)))
+        self.invalidate()
+    
+    def addItem(self, item):
+        self._items.append(item)
+    
+    def count(self):
+        return len(self._items)
+    
+    def itemAt(self, index):
+        if 0 <= index < len(self._items):
+            return self._items[index]
+        return None
+    
+    def takeAt(self, index):
+        if 0 <= index < len(self._items):
+            return self._items.pop(index)
+        return None
+    
+    def expandingDirections(self):
+        return Qt.Orientations(Qt.Horizontal)
+    
+    def hasHeightForWidth(self):
+        return True
+    
+    def heightForWidth(self, width):
+        margins = self.contentsMargins()
+        return self._grid_height() + margins.top() + margins.bottom()
+    
+    def minimumSize(self):
+        margins = self.contentsMargins()
+        return QSize(margins.left() + margins.right(), self.heightForWidth(0))
+    
+    def sizeHint(self):
+        return self.minimumSize()
+    
+    def _visible_items(self):
+        """Items of tiles that aren't hidden"""
+        return [item for item in self._items if not item.isEmpty()]
+    
+    def _tile_height(self, items):
+        return max(item.sizeHint().height() for item in items)
+    
+    def _grid_height(self):
+        items = self._visible_items()
+        if not items:
+            return 0
+        rows = -(-len(items) // self._columns)
+        return rows * self._tile_height(items) + (rows - 1) * self.spacing()
+    
+    def setGeometry(self, rect):
+        super().setGeometry(rect)
+        items = self._visible_items()
+        if not items:
+            return
+        
+        # Every tile gets the same size: an equal share of the width and the tallest size hint
+        area = self.contentsRect()
+        spacing = self.spacing()
+        cols = self._columns
+        width = (area.width() - spacing * (cols - 1)) // cols
+        height = self._tile_height(items)
+        for idx, item in enumerate(items):
+            row, col = divmod(idx, cols)
+            item.setGeometry(QRect(area.x() + col * (width + spacing),
+                                   area.y() + row * (height + spacing), width, height))
 
 class DriveSelectionWidget(QWidget):
     """Drive selection widget class"""
@@ -150,10 +217,22 @@ class DriveSelectionWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.lang = LanguageManager()
+        self._free_space_text = self.lang.get_text('free_space')
         self.current_drives_info = {}
         self.current_sd_drive = None
         self.selected_drive = None
         self.required_space_gb = 0
+        self._tiles = {}  # {drive: DriveTile}, kept across rebuilds and only re-positioned
+        self._selected_tile = None
+        self._all_visible = False  # show_all_drives() in effect, until the next space filter
+        self._last_cols = -1
+        self._force_rebuild = True  # Set when the drives or the filter change, not just the width
+        
+        # A window drag resizes many times a second, rebuild once it pauses
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.timeout.connect(self.rebuild_grid)
+        
         self.init_ui()
     
     def init_ui(self):
@@ -193,7 +272,8 @@ class DriveSelectionWidget(QWidget):
         """)
         
         self.tiles_container = QWidget()
-        self.tiles_layout = QGridLayout(self.tiles_container)
+        self.tiles_container.setStyleSheet(TILES_STYLESHEET)
+        self.tiles_layout = TileGridLayout(self.tiles_container)
         self.tiles_layout.setSpacing(15)
         self.tiles_layout.setContentsMargins(0, 0, 0, 0)
         
@@ -203,18 +283,37 @@ class DriveSelectionWidget(QWidget):
     def update_drives(self, drives_info):
         """Update drive list and store info for resizing"""
         self.current_drives_info = drives_info
+        
+        # Only create tiles for new drives and drop the ones that are gone
+        for drive in list(self._tiles):
+            if drive not in drives_info:
+                tile = self._tiles.pop(drive)
+                if tile is self._selected_tile:
+                    self._selected_tile = None
+                self.tiles_layout.removeWidget(tile)
+                tile.deleteLater()
+        for drive, info in drives_info.items():
+            info['_color_index'] = color_index(drive)
+            tile = self._tiles.get(drive)
+            if tile is None:
+                tile = DriveTile(info, drives_info, self.tiles_container, self._free_space_text)
+                tile.clicked.connect(self.on_drive_selected)
+                # Re-select if it was selected
+                if drive == self.selected_drive:
+                    tile.set_selected(True)
+                    self._selected_tile = tile
+                self._tiles[drive] = tile
+                self.tiles_layout.addWidget(tile)
+            else:
+                tile.update_info(info, drives_info)
+        
+        self._force_rebuild = True
         self.rebuild_grid()
 
     def rebuild_grid(self):
-        """Rebuild the grid layout based on current width"""
+        """Re-position the drive tiles for the current width"""
         if not hasattr(self, 'tiles_layout'): return
             
-        # Clear existing tiles
-        for i in reversed(range(self.tiles_layout.count())):
-            item = self.tiles_layout.itemAt(i)
-            if item and item.widget():
-                item.widget().setParent(None)
-        
         # Calculate columns based on width
         # Width of individual tiles is roughly 300-400px
         width = self.width()
@@ -226,60 +325,60 @@ class DriveSelectionWidget(QWidget):
             cols = 3
         else:
             cols = 4
-            
-        # Add new tiles
-        row, col = 0, 0
-        visible_drives = 0
-        for drive, info in self.current_drives_info.items():
+        
+        # Same columns and same tiles: the grid is already right
+        if cols == self._last_cols and not self._force_rebuild:
+            return
+        self._last_cols = cols
+        self._force_rebuild = False
+        
+        # Re-position everything with painting off, so it repaints once at the end
+        self.tiles_container.setUpdatesEnabled(False)
+        try:
             # Filter by space if required
-            if not self.check_drive_space(drive):
-                continue
-                
-            visible_drives += 1
-            tile = DriveTile(info, self.current_drives_info)
-            # Re-select if it was selected
-            if drive == self.selected_drive:
-                tile.set_selected(True)
-                
-            self.tiles_layout.addWidget(tile, row, col)
-            col += 1
-            if col >= cols:
-                col = 0
-                row += 1
+            required = 0 if self._all_visible else self.required_space_gb
+            visible_drives = [drive for drive, info in self.current_drives_info.items()
+                              if info['free_gb'] >= required]
+            for drive, tile in self._tiles.items():
+                tile.setVisible(drive in visible_drives)
+            
+            # Every tile stays in the layout, which skips hidden ones and works out
+            # rows and columns for the rest
+            self.tiles_layout.set_columns(cols)
+            self.tiles_layout.set_order([self._tiles[drive] for drive in self.current_drives_info])
+        finally:
+            self.tiles_container.setUpdatesEnabled(True)
         
         # If the selected drive is no longer visible, reset it
-        if self.selected_drive and not self.check_drive_space(self.selected_drive):
+        if self.selected_drive and self.selected_drive not in visible_drives:
             self.selected_drive = None
-        
-        # Add a stretch to the bottom to keep tiles at top
-        # self.tiles_layout.setRowStretch(row + 1, 1)
+            # The tile outlives the rebuild, so drop its highlight too
+            if self._selected_tile is not None:
+                self._selected_tile.set_selected(False)
+                self._selected_tile = None
 
     def resizeEvent(self, event):
         """Rebuild grid when widget is resized"""
         super().resizeEvent(event)
-        # Use a small delay/throttle if needed, but for simple grid rebuild it's usually fine
-        self.rebuild_grid()
+        self._resize_timer.start(50)
     
     def on_drive_selected(self, drive):
         """Handle drive selection with improved logic"""
-        print(f"Drive selection called for: {drive}")
+        logger.debug("Drive selection called for: %s", drive)
         
-        # Deselect all drives first
-        for i in range(self.tiles_layout.count()):
-            item = self.tiles_layout.itemAt(i)
-            if item and item.widget() and isinstance(item.widget(), DriveTile):
-                item.widget().set_selected(False)
+        # Deselect the previous drive
+        if self._selected_tile is not None:
+            self._selected_tile.set_selected(False)
+            self._selected_tile = None
         
-        # Select the clicked drive
-        for i in range(self.tiles_layout.count()):
-            item = self.tiles_layout.itemAt(i)
-            if item and item.widget() and isinstance(item.widget(), DriveTile):
-                if item.widget().drive_info['drive'] == drive:
-                    item.widget().set_selected(True)
-                    self.selected_drive = drive
-                    self.drive_selected.emit(drive)  # Emit signal to update backup destination
-                    print(f"Drive selected and signal emitted: {drive}")
-                    break
+        # Select the clicked drive if its tile is shown
+        tile = self._tiles.get(drive)
+        if tile is not None and not tile.isHidden():
+            tile.set_selected(True)
+            self._selected_tile = tile
+            self.selected_drive = drive
+            self.drive_selected.emit(drive)  # Emit signal to update backup destination
+            logger.debug("Drive selected and signal emitted: %s", drive)
     
     def set_sd_card_drive(self, drive):
         """Set SD card drive"""
@@ -298,22 +397,27 @@ class DriveSelectionWidget(QWidget):
     def filter_drives_by_space(self, required_space_gb):
         """Filter drives by required space and update layout"""
         self.required_space_gb = required_space_gb
+        self._all_visible = False
         # We need to rebuild the grid to hide items properly and adjust layout
+        self._force_rebuild = True
         self.rebuild_grid()
 
     def get_first_available_drive(self):
         """Get the first drive that meets space requirements"""
+        required = self.required_space_gb
         for drive, info in self.current_drives_info.items():
-            if self.check_drive_space(drive):
+            if info['free_gb'] >= required:
                 return drive
         return None
     
     def show_all_drives(self):
         """Show all drives"""
-        for i in range(self.tiles_layout.count()):
-            tile = self.tiles_layout.itemAt(i)
-            if isinstance(tile.widget(), DriveTile):
-                tile.widget().setVisible(True)
+        if self._all_visible:
+            return
+        self._all_visible = True
+        # Rebuild without the space filter
+        self._force_rebuild = True
+        self.rebuild_grid()
     
     def set_selected_drive(self, drive):
         """Set the selected drive and update the UI"""
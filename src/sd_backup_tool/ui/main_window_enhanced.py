@@ -8,31 +8,266 @@ Includes a visual drive selector and pie chart display, removes automatic eject
 import os
 import sys
 import json
+import time
+import ctypes
+from ctypes import wintypes
 from datetime import datetime
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QPushButton, QProgressBar, QGroupBox, QGridLayout,
     QSizePolicy, QMessageBox, QFileDialog, QScrollArea, QDialog, QFrame, QComboBox
 )
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QSize, QSettings
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QSize, QSettings, QObject, QRunnable, QThreadPool
 from PyQt5.QtGui import QFont, QIcon
 from ..core.sd_detector_fixed import SDCardDetector
 from ..core.file_scanner import FileScanner
 from ..core.backup_worker import BackupWorker
+from ..core.logging_setup import configure_logger
 from .drive_tile_widget import DriveSelectionWidget
 from ..locales import LanguageManager
 import shutil
 
+# Drive refresh details are logged at DEBUG; set SDBACKUP_LOGLEVEL=DEBUG to see them
+logger = configure_logger(__name__)
+
+# Free space straight from kernel32, without shutil's path handling around it
+try:
+    _GetDiskFreeSpaceExW = ctypes.WinDLL('kernel32', use_last_error=True).GetDiskFreeSpaceExW
+    _GetDiskFreeSpaceExW.argtypes = [wintypes.LPCWSTR, ctypes.POINTER(ctypes.c_ulonglong),
+                                     ctypes.POINTER(ctypes.c_ulonglong), ctypes.POINTER(ctypes.c_ulonglong)]
+    _GetDiskFreeSpaceExW.restype = wintypes.BOOL
+except (AttributeError, OSError):
+    _GetDiskFreeSpaceExW = None
+
+def _disk_usage(drive):
+    """(total, used, free) bytes of a drive, like shutil.disk_usage"""
+    if _GetDiskFreeSpaceExW is None:
+        return tuple(shutil.disk_usage(drive))
+    free = ctypes.c_ulonglong()
+    total = ctypes.c_ulonglong()
+    total_free = ctypes.c_ulonglong()
+    if not _GetDiskFreeSpaceExW(drive, ctypes.byref(free), ctypes.byref(total), ctypes.byref(total_free)):
+        raise ctypes.WinError(ctypes.get_last_error())
+    return total.value, total.value - total_free.value, free.value
+
+# Main window stylesheets, shared instead of rebuilt in each create_* method
+REFRESH_BUTTON_QSS = """
+    QPushButton {
+        background-color: #3498db;
+        color: white;
+        border: none;
+        padding: 10px 20px;
+        border-radius: 6px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #2980b9;
+    }
+"""
+
+SCAN_BUTTON_QSS = """
+    QPushButton {
+        background-color: #27ae60;
+        color: white;
+        border: none;
+        padding: 10px 20px;
+        border-radius: 6px;
+        font-weight: bold;
+    }
+    QPushButton:hover {
+        background-color: #2ecc71;
+    }
+    QPushButton:disabled {
+        background-color: #bdc3c7;
+        color: #7f8c8d;
+    }
+"""
+
+SOURCE_SELECTOR_QSS = """
+    QComboBox {
+        padding: 10px;
+        border: 2px solid #3498db;
+        border-radius: 6px;
+        background: white;
+        min-width: 200px;
+    }
+"""
+
+PHOTO_RESULT_QSS = """
+    QLabel {
+        background-color: #e8f6f3;
+        border: 2px solid #1abc9c;
+        border-radius: 10px;
+        padding: 20px;
+        color: #16a085;
+    }
+"""
+
+VIDEO_RESULT_QSS = """
+    QLabel {
+        background-color: #ebf5fb;
+        border: 2px solid #3498db;
+        border-radius: 10px;
+        padding: 20px;
+        color: #2980b9;
+    }
+"""
+
+RAW_RESULT_QSS = """
+    QLabel {
+        background-color: #fef9e7;
+        border: 2px solid #f1c40f;
+        border-radius: 10px;
+        padding: 20px;
+        color: #d35400;
+    }
+"""
+
+TOTAL_RESULT_QSS = """
+    QLabel {
+        background-color: #f4ecf7;
+        border: 2px solid #9b59b6;
+        border-radius: 10px;
+        padding: 20px;
+        color: #8e44ad;
+    }
+"""
+
+BACKUP_BUTTON_QSS = """
+    QPushButton {
+        background-color: #e74c3c;
+        color: white;
+        border: none;
+        padding: 15px;
+        border-radius: 8px;
+        font-weight: bold;
+    }
+    QPushButton:hover:enabled {
+        background-color: #c0392b;
+    }
+    QPushButton:disabled {
+        background-color: #bdc3c7;
+        color: #7f8c8d;
+    }
+"""
+
+PROGRESS_BAR_QSS = """
+    QProgressBar {
+        border: 2px solid #bdc3c7;
+        border-radius: 8px;
+        text-align: center;
+        font-weight: bold;
+        background-color: #ecf0f1;
+    }
+    QProgressBar::chunk {
+        background-color: #3498db;
+        border-radius: 6px;
+    }
+"""
+
+class _DriveEnumSignals(QObject):
+    """Signals of DriveEnumTask (QRunnable isn't a QObject)"""
+    drives_ready = pyqtSignal(dict)
+
+class DriveEnumTask(QRunnable):
+    """Lists the fixed drives usable as backup destination, off the GUI thread"""
+    
+    def __init__(self, source_id, cache, cache_ttl):
+        super().__init__()
+        self.source_id = source_id  # Current source drive, left out of the list
+        self.cache = cache          # MainWindow._drive_cache, shared between runs
+        self.cache_ttl = cache_ttl
+        self.signals = _DriveEnumSignals()
+    
+    def run(self):
+        """Probe the drives and emit drives_ready"""
+        logger.debug("Starting drive detection...")
+        drives_info = {}
+        
+        try:
+            import win32api
+            import win32file
+            
+            # Get all drives - one bitmask instead of a string to split
+            mask = win32api.GetLogicalDrives()
+            drives = [f"{chr(ord('A') + i)}:\\" for i in range(26) if mask & (1 << i)]
+            logger.debug("Found drives: %s", drives)
+            
+            now = time.monotonic()
+            for drive in drives:
+                try:
+                    cached = self.cache.get(drive)
+                    if cached is not None and now - cached[0] < self.cache_ttl:
+                        _, drive_type, usage = cached
+                    else:
+                        drive_type = win32file.GetDriveType(drive)
+                        usage = _disk_usage(drive) if drive_type == win32file.DRIVE_FIXED else None
+                        self.cache[drive] = (now, drive_type, usage)
+                    
+                    # Check if drive is ready
+                    if drive_type == win32file.DRIVE_FIXED:
+                        logger.debug("Checking drive %s", drive)
+                        total, used, free = usage
+                        logger.debug("Drive %s - Total: %s, Used: %s, Free: %s", drive, total, used, free)
+                        
+                        # Convert to GB
+                        total_gb = total / (1024**3)
+                        free_gb = free / (1024**3)
+                        used_gb = used / (1024**3)
+                        
+                        # Skip if this is the current source drive
+                        if self.source_id:
+                            if drive.upper() == self.source_id.upper():
+                                logger.debug("Skipping drive %s as it is the current source", drive)
+                                continue
+
+                        drives_info[drive] = {
+                            'drive': drive,
+                            'name': '',  # Default empty name
+                            'total_gb': total_gb,
+                            'free_gb': free_gb,
+                            'used_gb': used_gb
+                        }
+                        logger.debug("Added drive %s to list (Free space: %.1fGB)", drive, free_gb)
+                    else:
+                        logger.debug("Drive %s is not a fixed drive", drive)
+                        
+                except Exception as e:
+                    logger.error("Error getting info for drive %s: %s", drive, e)
+                    continue
+                    
+        except Exception as e:
+            logger.error("Error updating drives: %s", e)
+        
+        logger.debug("Final drives_info: %s", drives_info)
+        
+        self.signals.drives_ready.emit(drives_info)
+
 class MainWindow(QMainWindow):
     """Main window class"""
     
+    # Fonts used by init_ui, created once by _ensure_fonts (needs the QApplication)
+    FONT_BODY = None
+    FONT_GROUP = None
+    FONT_LARGE = None
+    FONT_STATUS = None
+    FONT_STATUS_BAR = None
+    FONT_SMALL = None
+    
     def __init__(self):
         super().__init__()
+        self._ensure_fonts()
         self.sd_detector = SDCardDetector()
         self.file_scanner = FileScanner()
         self.backup_worker = None
         self.scanned_files = []
         self.settings = QSettings('SDBackupTool', 'PhotoVideoBackupTool')
+        # {drive: (time, drive type, disk_usage or None)} so a burst of refreshes probes each drive once
+        self._drive_cache = {}
+        self._drive_cache_ttl = 2.0
+        self._drive_enum_inflight = False  # A DriveEnumTask is running
+        self._drive_enum_again = False     # update_destination_drives() was called meanwhile
+        self._pending_destination = None   # Last destination, selected once the drives are listed
         
         # Initialize language manager
         self.lang = LanguageManager()
@@ -56,6 +291,18 @@ class MainWindow(QMainWindow):
         self.init_sd_detection()
         self.load_settings()
     
+    @classmethod
+    def _ensure_fonts(cls):
+        """Create the shared fonts on first use"""
+        if cls.FONT_BODY is not None:
+            return
+        cls.FONT_BODY = QFont("Microsoft JhengHei", 12)
+        cls.FONT_GROUP = QFont("Microsoft JhengHei", 14, QFont.Bold)
+        cls.FONT_LARGE = QFont("Microsoft JhengHei", 20, QFont.Bold)
+        cls.FONT_STATUS = QFont("Microsoft JhengHei", 13)
+        cls.FONT_STATUS_BAR = QFont("Microsoft JhengHei", 11)
+        cls.FONT_SMALL = QFont("Microsoft JhengHei", 10)
+    
     def init_ui(self):
         """Initialize user interface"""
         self.setWindowTitle(self.lang.get_text('window_title'))
@@ -65,8 +312,7 @@ class MainWindow(QMainWindow):
         self.showMaximized()
         
         # Set font
-        font = QFont("Microsoft JhengHei", 12)
-        self.setFont(font)
+        self.setFont(self.FONT_BODY)
         
         # Create central layout inside a scroll area to handle vertical resizing
         main_scroll = QScrollArea()
@@ -108,71 +354,35 @@ class MainWindow(QMainWindow):
         status_container.setSpacing(20)
         
         group = QGroupBox(self.lang.get_text('sd_card_status'))
-        group.setFont(QFont("Microsoft JhengHei", 14, QFont.Bold))
+        group.setFont(self.FONT_GROUP)
         group_layout = QVBoxLayout()
         
         status_layout = QHBoxLayout()
         
         self.refresh_button = QPushButton(self.lang.get_text('refresh'))
-        self.refresh_button.setFont(QFont("Microsoft JhengHei", 12))
-        self.refresh_button.setStyleSheet("""
-            QPushButton {
-                background-color: #3498db;
-                color: white;
-                border: none;
-                padding: 10px 20px;
-                border-radius: 6px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2980b9;
-            }
-        """)
+        self.refresh_button.setFont(self.FONT_BODY)
+        self.refresh_button.setStyleSheet(REFRESH_BUTTON_QSS)
         self.refresh_button.clicked.connect(self.refresh_drives)
         status_layout.addWidget(self.refresh_button)
         
         # Add manual scan button for MTP devices
         self.scan_button = QPushButton(self.lang.get_text('scan_device'))
-        self.scan_button.setFont(QFont("Microsoft JhengHei", 12))
-        self.scan_button.setStyleSheet("""
-            QPushButton {
-                background-color: #27ae60;
-                color: white;
-                border: none;
-                padding: 10px 20px;
-                border-radius: 6px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #2ecc71;
-            }
-            QPushButton:disabled {
-                background-color: #bdc3c7;
-                color: #7f8c8d;
-            }
-        """)
+        self.scan_button.setFont(self.FONT_BODY)
+        self.scan_button.setStyleSheet(SCAN_BUTTON_QSS)
         self.scan_button.clicked.connect(self.manual_scan)
         self.scan_button.setEnabled(True)
         status_layout.addWidget(self.scan_button)
         
         # Add source selector dropdown (hidden by default)
         self.source_selector = QComboBox()
-        self.source_selector.setFont(QFont("Microsoft JhengHei", 12))
-        self.source_selector.setStyleSheet("""
-            QComboBox {
-                padding: 10px;
-                border: 2px solid #3498db;
-                border-radius: 6px;
-                background: white;
-                min-width: 200px;
-            }
-        """)
+        self.source_selector.setFont(self.FONT_BODY)
+        self.source_selector.setStyleSheet(SOURCE_SELECTOR_QSS)
         self.source_selector.currentIndexChanged.connect(self.on_source_changed)
         self.source_selector.setVisible(False)
         status_layout.addWidget(self.source_selector)
         
         self.sd_status_label = QLabel(self.lang.get_text('searching_sd'))
-        self.sd_status_label.setFont(QFont("Microsoft JhengHei", 13))
+        self.sd_status_label.setFont(self.FONT_STATUS)
         self.sd_status_label.setStyleSheet("padding: 15px; background-color: #f8f9fa; border-radius: 8px;")
         self.sd_status_label.setMinimumWidth(260)
         self.sd_status_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
@@ -188,7 +398,7 @@ class MainWindow(QMainWindow):
     def create_destination_group_enhanced(self, layout):
         """Create enhanced destination selection group"""
         group = QGroupBox(self.lang.get_text('backup_destination'))
-        group.setFont(QFont("Microsoft JhengHei", 14, QFont.Bold))
+        group.setFont(self.FONT_GROUP)
         group_layout = QVBoxLayout()
         group_layout.setContentsMargins(20, 20, 20, 20)
         group_layout.setSpacing(15)
@@ -204,7 +414,7 @@ class MainWindow(QMainWindow):
     def create_scan_group(self, layout):
         """Create file scan group"""
         group = QGroupBox(self.lang.get_text('file_scan'))
-        group.setFont(QFont("Microsoft JhengHei", 14, QFont.Bold))
+        group.setFont(self.FONT_GROUP)
         group_layout = QVBoxLayout()
         
         self.scan_result_grid = QGridLayout()
@@ -212,64 +422,32 @@ class MainWindow(QMainWindow):
         
         # Photo results
         self.photo_result = QLabel(self.lang.get_text('photos', 0))
-        self.photo_result.setFont(QFont("Microsoft JhengHei", 20, QFont.Bold))
-        self.photo_result.setStyleSheet("""
-            QLabel {
-                background-color: #e8f6f3;
-                border: 2px solid #1abc9c;
-                border-radius: 10px;
-                padding: 20px;
-                color: #16a085;
-            }
-        """)
+        self.photo_result.setFont(self.FONT_LARGE)
+        self.photo_result.setStyleSheet(PHOTO_RESULT_QSS)
         self.photo_result.setAlignment(Qt.AlignCenter)
         self.photo_result.setMinimumHeight(80)
         self.scan_result_grid.addWidget(self.photo_result, 0, 0)
         
         # Video results
         self.video_result = QLabel(self.lang.get_text('videos', 0))
-        self.video_result.setFont(QFont("Microsoft JhengHei", 20, QFont.Bold))
-        self.video_result.setStyleSheet("""
-            QLabel {
-                background-color: #ebf5fb;
-                border: 2px solid #3498db;
-                border-radius: 10px;
-                padding: 20px;
-                color: #2980b9;
-            }
-        """)
+        self.video_result.setFont(self.FONT_LARGE)
+        self.video_result.setStyleSheet(VIDEO_RESULT_QSS)
         self.video_result.setAlignment(Qt.AlignCenter)
         self.video_result.setMinimumHeight(80)
         self.scan_result_grid.addWidget(self.video_result, 0, 1)
         
         # RAW file results
         self.raw_result = QLabel(self.lang.get_text('raw_files', 0))
-        self.raw_result.setFont(QFont("Microsoft JhengHei", 20, QFont.Bold))
-        self.raw_result.setStyleSheet("""
-            QLabel {
-                background-color: #fef9e7;
-                border: 2px solid #f1c40f;
-                border-radius: 10px;
-                padding: 20px;
-                color: #d35400;
-            }
-        """)
+        self.raw_result.setFont(self.FONT_LARGE)
+        self.raw_result.setStyleSheet(RAW_RESULT_QSS)
         self.raw_result.setAlignment(Qt.AlignCenter)
         self.raw_result.setMinimumHeight(80)
         self.scan_result_grid.addWidget(self.raw_result, 1, 0)
         
         # Total size results
         self.total_result = QLabel(self.lang.get_text('total_size', 0))
-        self.total_result.setFont(QFont("Microsoft JhengHei", 20, QFont.Bold))
-        self.total_result.setStyleSheet("""
-            QLabel {
-                background-color: #f4ecf7;
-                border: 2px solid #9b59b6;
-                border-radius: 10px;
-                padding: 20px;
-                color: #8e44ad;
-            }
-        """)
+        self.total_result.setFont(self.FONT_LARGE)
+        self.total_result.setStyleSheet(TOTAL_RESULT_QSS)
         self.total_result.setAlignment(Qt.AlignCenter)
         self.total_result.setMinimumHeight(80)
         self.scan_result_grid.addWidget(self.total_result, 1, 1)
@@ -281,52 +459,24 @@ class MainWindow(QMainWindow):
     def create_backup_group(self, layout):
         """Create backup group"""
         group = QGroupBox("檔案備份")
-        group.setFont(QFont("Microsoft JhengHei", 14, QFont.Bold))
+        group.setFont(self.FONT_GROUP)
         group_layout = QVBoxLayout()
         
         self.backup_button = QPushButton(self.lang.get_text('start_backup'))
-        self.backup_button.setFont(QFont("Microsoft JhengHei", 20, QFont.Bold))
+        self.backup_button.setFont(self.FONT_LARGE)
         self.backup_button.setMinimumHeight(60)
         self.backup_button.setEnabled(False)
-        self.backup_button.setStyleSheet("""
-            QPushButton {
-                background-color: #e74c3c;
-                color: white;
-                border: none;
-                padding: 15px;
-                border-radius: 8px;
-                font-weight: bold;
-            }
-            QPushButton:hover:enabled {
-                background-color: #c0392b;
-            }
-            QPushButton:disabled {
-                background-color: #bdc3c7;
-                color: #7f8c8d;
-            }
-        """)
+        self.backup_button.setStyleSheet(BACKUP_BUTTON_QSS)
         self.backup_button.clicked.connect(self.start_backup)
         group_layout.addWidget(self.backup_button)
         
         self.progress_bar = QProgressBar()
         self.progress_bar.setMinimumHeight(30)
-        self.progress_bar.setStyleSheet("""
-            QProgressBar {
-                border: 2px solid #bdc3c7;
-                border-radius: 8px;
-                text-align: center;
-                font-weight: bold;
-                background-color: #ecf0f1;
-            }
-            QProgressBar::chunk {
-                background-color: #3498db;
-                border-radius: 6px;
-            }
-        """)
+        self.progress_bar.setStyleSheet(PROGRESS_BAR_QSS)
         group_layout.addWidget(self.progress_bar)
         
         self.current_file_label = QLabel("")
-        self.current_file_label.setFont(QFont("Microsoft JhengHei", 10))
+        self.current_file_label.setFont(self.FONT_SMALL)
         self.current_file_label.setStyleSheet("color: #7f8c8d; padding: 5px;")
         group_layout.addWidget(self.current_file_label)
         
@@ -338,7 +488,7 @@ class MainWindow(QMainWindow):
         bottom_layout = QHBoxLayout()
         
         self.status_label = QLabel("")
-        self.status_label.setFont(QFont("Microsoft JhengHei", 11))
+        self.status_label.setFont(self.FONT_STATUS_BAR)
         self.status_label.setStyleSheet("color: #7f8c8d; padding: 10px;")
         bottom_layout.addWidget(self.status_label)
         
@@ -347,8 +497,8 @@ class MainWindow(QMainWindow):
     
     def init_connections(self):
         """Initialize signal connections"""
-        self.sd_detector.sd_card_detected.connect(self.on_sd_card_detected)
-        self.sd_detector.sd_card_removed.connect(self.on_sd_card_removed)
+        self.sd_detector.sd_cards_changed.connect(self.on_sd_cards_changed)
+        self.sd_detector.sd_cards_changed.connect(self.invalidate_drive_cache)
         self.file_scanner.scan_completed.connect(self.on_scan_completed)
     
     def init_sd_detection(self):
@@ -360,7 +510,8 @@ class MainWindow(QMainWindow):
         """Load settings"""
         last_destination = self.settings.value('last_destination', '')
         if last_destination:
-            self.drive_selector.set_selected_drive(last_destination)
+            # The drives are still being listed, _apply_drives_info selects it
+            self._pending_destination = last_destination
     
     def save_settings(self):
         """Save settings"""
@@ -371,78 +522,56 @@ class MainWindow(QMainWindow):
     def refresh_drives(self):
         """Manually refresh both Source and Destination drives"""
         try:
-            print("Refreshing all drives (Source & Destination)...")
+            logger.debug("Refreshing all drives (Source & Destination)...")
             self.update_destination_drives()
             
             # Trigger a re-check in the background detector
             if hasattr(self, 'sd_detector'):
-                from PyQt5.QtCore import QTimer
-                QTimer.singleShot(0, self.sd_detector.check_drives)
+                self.sd_detector.request_check()
                 
             self.status_label.setText(self.lang.get_text('refreshing_devices'))
         except Exception as e:
-            print(f"Error refreshing drives: {e}")
+            logger.error("Error refreshing drives: %s", e)
     
     def update_destination_drives(self):
-        """Update destination drive list"""
-        print("Starting drive detection...")
-        drives_info = {}
-        
-        try:
-            import win32api
-            import win32file
-            
-            # Get all drives
-            drives = win32api.GetLogicalDriveStrings()
-            drives = drives.split('\000')[:-1]
-            print(f"Found drives: {drives}")
-            
-            for drive in drives:
-                try:
-                    # Check if drive is ready
-                    if win32file.GetDriveType(drive) == win32file.DRIVE_FIXED:
-                        print(f"Checking drive {drive}")
-                        total, used, free = shutil.disk_usage(drive)
-                        print(f"Drive {drive} - Total: {total}, Used: {used}, Free: {free}")
-                        
-                        # Convert to GB
-                        total_gb = total / (1024**3)
-                        free_gb = free / (1024**3)
-                        used_gb = used / (1024**3)
-                        
-                        # Skip if this is the current source drive
-                        if hasattr(self, 'current_sd_drive') and self.current_sd_drive:
-                            if drive.upper() == self.current_sd_drive.get('id', '').upper():
-                                print(f"Skipping drive {drive} as it is the current source")
-                                continue
-
-                        drives_info[drive] = {
-                            'drive': drive,
-                            'name': '',  # Default empty name
-                            'total_gb': total_gb,
-                            'free_gb': free_gb,
-                            'used_gb': used_gb
-                        }
-                        print(f"Added drive {drive} to list (Free space: {free_gb:.1f}GB)")
-                    else:
-                        print(f"Drive {drive} is not a fixed drive")
-                        
-                except Exception as e:
-                    print(f"Error getting info for drive {drive}: {e}")
-                    continue
-                    
-        except Exception as e:
-            print(f"Error updating drives: {e}")
+        """Update destination drive list - the drives are probed on a thread pool thread"""
+        if self._drive_enum_inflight:
+            # Run again once the current listing is in, it may predate this request
+            self._drive_enum_again = True
+            return
+        self._drive_enum_inflight = True
         
-        print(f"Final drives_info: {drives_info}")
+        source_id = None
+        if hasattr(self, 'current_sd_drive') and self.current_sd_drive:
+            source_id = self.current_sd_drive.get('id', '')
+        task = DriveEnumTask(source_id, self._drive_cache, self._drive_cache_ttl)
+        task.signals.drives_ready.connect(self._apply_drives_info)
+        QThreadPool.globalInstance().start(task)
+    
+    def _apply_drives_info(self, drives_info):
+        """Show the drives listed by DriveEnumTask (runs on the GUI thread)"""
+        self._drive_enum_inflight = False
         
         # Update drive selector
         if hasattr(self, 'drive_selector'):
-            print("Updating drive selector...")
+            logger.debug("Updating drive selector...")
             self.drive_selector.update_drives(drives_info)
-            print("Drive selector updated")
+            logger.debug("Drive selector updated")
+            
+            # Restore the last destination once the first listing is in
+            if self._pending_destination:
+                self.drive_selector.set_selected_drive(self._pending_destination)
+                self._pending_destination = None
         else:
-            print("Drive selector not found!")
+            logger.warning("Drive selector not found!")
+        
+        if self._drive_enum_again:
+            self._drive_enum_again = False
+            self.update_destination_drives()
+    
+    def invalidate_drive_cache(self):
+        """Forget cached drive types and sizes, e.g. after a device was plugged in or removed"""
+        self._drive_cache.clear()
     
     def on_drive_selected(self, drive_path):
         """Handle drive selection event"""
@@ -467,6 +596,15 @@ class MainWindow(QMainWindow):
                 else:
                     print("Smart scanning not available - using regular scanning")
     
+    def on_sd_cards_changed(self, added: list, removed: list):
+        """Handle every device arrival/removal found by one detector check."""
+        # Clean up after the devices that left first, so a swap ends on the new device
+        for device_id in removed:
+            self.on_sd_card_removed(device_id)
+        if added:
+            # Only one device can be the source; take the first in drive order
+            self.on_sd_card_detected(added[0])
+    
     def on_sd_card_detected(self, device_info: dict):
         """Handle SD card/MTP device detection."""
         # Always update the selector first
@@ -569,12 +707,14 @@ class MainWindow(QMainWindow):
         # UNIVERSAL AUTO-SCAN:
         # Automatically trigger scan for ALL device types (SD, MTP, etc.)
         # to maximize simplicity. The user just plugs it in, and we do the work.
-        print(f"Automatically starting scan for {device_type} device: {display_name}")
+        logger.debug("Automatically starting scan for %s device: %s", device_type, display_name)
         self.reset_scan_ui()
         self.start_scan()
     
     def on_sd_card_removed(self, removed_device_id: str):
         """Handle SD card/MTP device removal."""
+        # A card put back later may have changed, so its scan result is not reused
+        self.file_scanner.clear_cache(removed_device_id)
         # Refresh selector first
         self._sync_source_selector()
         
@@ -633,8 +773,8 @@ class MainWindow(QMainWindow):
             # Show scanning status
             self.status_label.setText(self.lang.get_text('scanning_device', device_name))
             
-            # Trigger scan
-            self.file_scanner.start_scan(device_id)
+            # Scanning the same, unchanged target again reuses its last result
+            self.file_scanner.scan_target(device_id)
         else:
             # Otherwise, let the user pick a folder manually
             dir_path = QFileDialog.getExistingDirectory(self, self.lang.get_text('select_source_folder'))